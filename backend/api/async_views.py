@@ -0,0 +1,215 @@
+"""Асинхронные представления для горячих GET-запросов.
+
+Подключаются через foodgram.async_urls при запуске под ASGI. Запрос,
+который здесь не обслуживается (другой метод, курсорная пагинация,
+выбор полей рецепта, неверный токен, ошибка фильтра, отсутствующий
+объект), передаётся обычному представлению DRF, поэтому ответы и
+ошибки совпадают с WSGI.
+
+Подсчёт и чтение страницы идут через асинхронный ORM (acount, async
+for). В потоке через sync_to_async остаются только синхронные по природе
+части: аутентификаторы DRF, проверка фильтров (формы django-filter
+читают теги из базы) и ключ кэша по версиям.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.paginator import InvalidPage
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import resolve
+from django.utils.http import parse_etags
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from apps.recipes import versions
+from apps.recipes.models import Ingredient, Recipe, Tag
+from apps.recipes.search import search_ingredients
+from foodgram.settings import ANONYMOUS_CACHE_TIMEOUT
+from .filters import RecipeFilter
+from .mixins import AnonymousCacheMixin, ReferenceCacheMixin
+from .pagination import CustomPagination
+from .recipes_serializers import (FollowSerializer, IngredientSerializer,
+                                  RecipeReadSerializer, TagSerializer)
+from .users_views import CustomUserViewSet
+
+SYNC_URLCONF = 'foodgram.urls'
+
+
+async def call_sync_view(request):
+    match = resolve(request.path_info, urlconf=SYNC_URLCONF)
+    return await sync_to_async(match.func)(
+        request, *match.args, **match.kwargs)
+
+
+def async_get(handler):
+    """GET обслуживает handler; если он вернул None - синхронный view."""
+    @functools.wraps(handler)
+    async def view(request, *args, **kwargs):
+        if request.method == 'GET':
+            response = await handler(request, *args, **kwargs)
+            if response is not None:
+                return response
+        return await call_sync_view(request)
+    # csrf_exempt в Django 4.2 не поддерживает async-функции.
+    view.csrf_exempt = True
+    return view
+
+
+def authenticate(request):
+    """Request DRF с пользователем от настроенных аутентификаторов;
+    None, если они отклонили учётные данные (ответит синхронный view)."""
+    request = Request(request, authenticators=[
+        auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        request.user
+    except exceptions.APIException:
+        return None
+    return request
+
+
+def has_fieldset(request):
+    return any(param in request.GET
+               for param in RecipeReadSerializer.fieldset_params)
+
+
+def render(data):
+    return HttpResponse(JSONRenderer().render(data),
+                        content_type='application/json')
+
+
+async def paginate(request, queryset, serialize):
+    """Страница в формате CustomPagination; None - на ошибку.
+
+    Номер страницы проверяет и ссылки строит сам CustomPagination,
+    COUNT(*) и строки страницы читаются асинхронно.
+    """
+    pagination = CustomPagination()
+    paginator = pagination.django_paginator_class(
+        queryset, pagination.get_page_size(request))
+    paginator.count = await queryset.acount()
+    try:
+        pagination.page = paginator.page(request.query_params.get(
+            pagination.page_query_param, 1))
+    except InvalidPage:
+        return None
+    pagination.request, pagination.use_cursor = request, False
+    items = [item async for item in pagination.page.object_list]
+    return pagination.get_paginated_response(serialize(items)).data
+
+
+async def anonymous_cached(request, user, version_name, load):
+    """Тот же кэш для анонимов, что и у AnonymousCacheMixin."""
+    if user.is_authenticated:
+        data = await load()
+        return None if data is None else render(data)
+    key = await sync_to_async(AnonymousCacheMixin.get_cache_key)(
+        request, version_name)
+    data = await cache.aget(key)
+    if data is not None:
+        AnonymousCacheMixin.stats['hits'] += 1
+        response = render(data)
+        response['X-Cache'] = 'HIT'
+        return response
+    data = await load()
+    if data is None:
+        return None
+    AnonymousCacheMixin.stats['misses'] += 1
+    await cache.aset(key, data, ANONYMOUS_CACHE_TIMEOUT)
+    response = render(data)
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+async def reference(request, version_name, load):
+    """Справочник с ETag и кэшем процесса, как у ReferenceCacheMixin."""
+    version = await sync_to_async(versions.get_version)(version_name)
+    etag = ReferenceCacheMixin.get_etag(version_name, version)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        key = (version_name, request.get_full_path())
+        data = ReferenceCacheMixin.get_payload(key, version)
+        if data is None:
+            data = await load()
+            ReferenceCacheMixin.set_payload(key, version, data)
+        response = render(data)
+    return ReferenceCacheMixin.patch_response(response, etag)
+
+
+@async_get
+async def recipe_list(request):
+    request = await sync_to_async(authenticate)(request)
+    if (request is None or CustomPagination.cursor_query_param in request.GET
+            or has_fieldset(request)):
+        return None
+    user = request.user
+    filterset = RecipeFilter(request.query_params, request=request,
+                             queryset=Recipe.objects.for_read(user))
+    if not await sync_to_async(filterset.is_valid)():
+        return None
+
+    async def load():
+        return await paginate(
+            request, filterset.qs, lambda recipes: RecipeReadSerializer(
+                recipes, many=True, context={'request': request}).data)
+    return await anonymous_cached(request, user, versions.RECIPES, load)
+
+
+@async_get
+async def recipe_detail(request, pk):
+    request = await sync_to_async(authenticate)(request)
+    if request is None or has_fieldset(request):
+        return None
+    user = request.user
+
+    async def load():
+        recipe = await Recipe.objects.for_read(user).filter(pk=pk).afirst()
+        if recipe is None:
+            return None
+        return RecipeReadSerializer(
+            recipe, context={'request': request}).data
+    return await anonymous_cached(
+        request, user, versions.recipe(pk), load)
+
+
+@async_get
+async def tag_list(request):
+    if await sync_to_async(authenticate)(request) is None:
+        return None
+
+    async def load():
+        return TagSerializer(
+            [tag async for tag in Tag.objects.all()], many=True).data
+    return await reference(request, versions.TAGS, load)
+
+
+@async_get
+async def ingredient_list(request):
+    if await sync_to_async(authenticate)(request) is None:
+        return None
+    name = request.GET.get('name')
+
+    async def load():
+        if name:
+            ingredients = await sync_to_async(search_ingredients)(name)
+        else:
+            ingredients = [ingredient async for ingredient
+                           in Ingredient.objects.all()]
+        return IngredientSerializer(ingredients, many=True).data
+    return await reference(request, versions.INGREDIENTS, load)
+
+
+@async_get
+async def subscriptions(request):
+    request = await sync_to_async(authenticate)(request)
+    if (request is None or not request.user.is_authenticated
+            or CustomPagination.cursor_query_param in request.GET):
+        return None
+    data = await paginate(
+        request, CustomUserViewSet().get_followed_authors(request),
+        lambda authors: FollowSerializer(
+            authors, many=True, context={'request': request}).data)
+    return None if data is None else render(data)
@@ -1,6 +1,18 @@
 from django_filters.rest_framework import FilterSet, filters
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
 
+from apps.recipes.fulltext import search_recipes
 from apps.recipes.models import Recipe, Tag
+from apps.recipes.search import search_ingredients
+
+
+class IngredientSearchFilter(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        name = request.query_params.get(api_settings.SEARCH_PARAM)
+        if not name or view.action != 'list':
+            return queryset
+        return search_ingredients(name)
 
 
 class RecipeFilter(FilterSet):
@@ -11,6 +23,7 @@ class RecipeFilter(FilterSet):
         method='is_favorited_filter')
     is_in_shopping_cart = filters.BooleanFilter(
         method='is_in_shopping_cart_filter')
+    search = filters.CharFilter(method='search_filter')
 
     class Meta:
         model = Recipe
@@ -27,3 +40,6 @@ class RecipeFilter(FilterSet):
         if value and user.is_authenticated:
             return queryset.filter(shopping__user=user)
         return queryset
+
+    def search_filter(self, queryset, name, value):
+        return search_recipes(queryset, value)
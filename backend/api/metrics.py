@@ -0,0 +1,230 @@
+"""Замеры запросов: SQL, сериализация, общее время.
+
+Middleware заводит на запрос объект Timing в contextvar; обёртка execute
+у каждого соединения и TimedSerializerMixin добавляют в него время.
+Итог уходит в заголовок Server-Timing и в гистограммы по представлениям,
+которые отдаёт /api/metrics/ в текстовом формате Prometheus.
+
+Гистограммы живут в памяти процесса, как у prometheus_client без
+multiprocess-режима: у каждого воркера gunicorn свои значения.
+"""
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpResponse, HttpResponseForbidden
+
+from foodgram.settings import METRICS_BUCKETS, METRICS_TOKEN
+
+from .mixins import AnonymousCacheMixin
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+current = ContextVar('timing', default=None)
+
+
+class Timing:
+    __slots__ = ('start', 'queries', 'spans', 'active')
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.queries = 0
+        self.spans = defaultdict(float)
+        self.active = set()
+
+
+@contextmanager
+def span(name):
+    """Добавляет время блока к отрезку name текущего запроса.
+
+    Вложенные блоки с тем же именем не учитываются повторно.
+    """
+    timing = current.get()
+    if timing is None or name in timing.active:
+        yield
+        return
+    timing.active.add(name)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timing.spans[name] += perf_counter() - start
+        timing.active.discard(name)
+
+
+def record_query(execute, sql, params, many, context):
+    timing = current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.queries += 1
+        timing.spans['db'] += perf_counter() - start
+
+
+def install_query_timer(connection, **kwargs):
+    """Приёмник connection_created: замеры для каждого соединения."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedSerializerMixin:
+    def to_representation(self, instance):
+        with span('serializer'):
+            return super().to_representation(instance)
+
+
+class Histograms:
+    """Гистограммы длительности и суммы замеров по (view, method)."""
+
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, labels, total, timing):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = {
+                    'buckets': [0] * len(self.buckets), 'count': 0,
+                    'sum': 0.0, 'queries': 0, 'spans': defaultdict(float)}
+            for index, bound in enumerate(self.buckets):
+                if total <= bound:
+                    series['buckets'][index] += 1
+            series['count'] += 1
+            series['sum'] += total
+            series['queries'] += timing.queries
+            for name, seconds in timing.spans.items():
+                series['spans'][name] += seconds
+
+    def render(self):
+        lines = [
+            '# HELP foodgram_request_duration_seconds Время ответа.',
+            '# TYPE foodgram_request_duration_seconds histogram',
+        ]
+        with self.lock:
+            series = sorted(
+                (labels, {**values, 'buckets': list(values['buckets']),
+                          'spans': dict(values['spans'])})
+                for labels, values in self.series.items())
+        for labels, values in series:
+            label = format_labels(labels)
+            for bound, count in zip(self.buckets, values['buckets']):
+                lines.append(
+                    f'foodgram_request_duration_seconds_bucket'
+                    f'{{{label},le="{bound}"}} {count}')
+            lines += [
+                f'foodgram_request_duration_seconds_bucket'
+                f'{{{label},le="+Inf"}} {values["count"]}',
+                f'foodgram_request_duration_seconds_sum{{{label}}} '
+                f'{values["sum"]}',
+                f'foodgram_request_duration_seconds_count{{{label}}} '
+                f'{values["count"]}',
+            ]
+        lines += [
+            '# HELP foodgram_request_queries_total SQL-запросы.',
+            '# TYPE foodgram_request_queries_total counter',
+            *(f'foodgram_request_queries_total{{{format_labels(labels)}}} '
+              f'{values["queries"]}' for labels, values in series),
+            '# HELP foodgram_request_span_seconds_total Время по отрезкам.',
+            '# TYPE foodgram_request_span_seconds_total counter',
+            *(f'foodgram_request_span_seconds_total'
+              f'{{{format_labels(labels)},span="{name}"}} {seconds}'
+              for labels, values in series
+              for name, seconds in sorted(values['spans'].items())),
+        ]
+        return lines
+
+
+def format_labels(labels):
+    view, method = labels
+    view = view.replace('\\', '\\\\').replace('"', '\\"')
+    return f'view="{view}",method="{method}"'
+
+
+histograms = Histograms()
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unmatched'
+
+
+def server_timing(timing, total):
+    parts = [f'db;dur={timing.spans["db"] * 1000:.1f};'
+             f'desc="{timing.queries} queries"']
+    parts += [f'{name};dur={seconds * 1000:.1f}'
+              for name, seconds in timing.spans.items() if name != 'db']
+    parts.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(parts)
+
+
+class ServerTimingMiddleware:
+    """Заголовок Server-Timing и гистограммы для каждого запроса."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timing = Timing()
+        token = current.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, timing)
+
+    async def __acall__(self, request):
+        timing = Timing()
+        token = current.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, timing)
+
+    def finish(self, request, response, timing):
+        total = perf_counter() - timing.start
+        # Метки ограничены, чтобы число рядов не росло от чужих запросов.
+        method = request.method if request.method in METHODS else 'OTHER'
+        histograms.observe((get_view_name(request), method), total, timing)
+        response['Server-Timing'] = server_timing(timing, total)
+        return response
+
+
+def has_metrics_access(request):
+    """Bearer-токен METRICS_TOKEN или сессия администратора."""
+    if (METRICS_TOKEN and request.headers.get('Authorization')
+            == f'Bearer {METRICS_TOKEN}'):
+        return True
+    return request.user.is_staff
+
+
+def metrics_view(request):
+    """Метрики в текстовом формате Prometheus."""
+    if not has_metrics_access(request):
+        return HttpResponseForbidden()
+    stats = AnonymousCacheMixin.stats
+    lines = histograms.render() + [
+        '# HELP foodgram_anonymous_cache_total Кэш ответов анонимам.',
+        '# TYPE foodgram_anonymous_cache_total counter',
+        f'foodgram_anonymous_cache_total{{result="hit"}} {stats["hits"]}',
+        f'foodgram_anonymous_cache_total{{result="miss"}} '
+        f'{stats["misses"]}',
+    ]
+    return HttpResponse('\n'.join(lines) + '\n', content_type=CONTENT_TYPE)
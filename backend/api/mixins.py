@@ -0,0 +1,117 @@
+import hashlib
+from collections import Counter
+
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.recipes import versions
+from foodgram.settings import (ANONYMOUS_CACHE_TIMEOUT,
+                               REFERENCE_CACHE_MAX_AGE, REFERENCE_CACHE_SIZE)
+
+
+class ReferenceCacheMixin:
+    """Кэширует справочные данные в памяти процесса.
+
+    Актуальность проверяется по общей для всех процессов версии
+    `version_name`, которую увеличивают сигналы при изменении модели.
+    """
+
+    version_name = None
+    payloads = {}
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, view, request, *args, **kwargs):
+        version = versions.get_version(self.version_name)
+        etag = self.get_etag(self.version_name, version)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            key = (self.version_name, request.get_full_path())
+            data = self.get_payload(key, version)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                self.set_payload(key, version, response.data)
+        return self.patch_response(response, etag)
+
+    @staticmethod
+    def get_etag(version_name, version):
+        return quote_etag(f'{version_name}-{version}')
+
+    @classmethod
+    def get_payload(cls, key, version):
+        version_data = cls.payloads.get(key)
+        if version_data and version_data[0] == version:
+            return version_data[1]
+        return None
+
+    @classmethod
+    def set_payload(cls, key, version, data):
+        if len(cls.payloads) >= REFERENCE_CACHE_SIZE:
+            cls.payloads.clear()
+        cls.payloads[key] = (version, data)
+
+    @staticmethod
+    def patch_response(response, etag):
+        response['ETag'] = etag
+        patch_cache_control(response, public=True,
+                            max_age=REFERENCE_CACHE_MAX_AGE)
+        return response
+
+
+class AnonymousCacheMixin:
+    """Кэширует list и retrieve для анонимных пользователей.
+
+    Ответ анонимному пользователю зависит только от адреса запроса,
+    поэтому ключ строится из адреса и версий данных, которые попадают
+    в ответ; устаревшие записи просто перестают запрашиваться.
+    """
+
+    stats = Counter()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            versions.RECIPES, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            versions.recipe(kwargs[self.lookup_field]), super().retrieve,
+            request, *args, **kwargs)
+
+    def cached_response(self, version_name, view, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        key = self.get_cache_key(request, version_name)
+        data = cache.get(key)
+        if data is not None:
+            self.stats['hits'] += 1
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        self.stats['misses'] += 1
+        response = view(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, ANONYMOUS_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    @staticmethod
+    def get_cache_key(request, version_name):
+        names = (version_name, versions.TAGS, versions.INGREDIENTS,
+                 versions.USERS)
+        parts = [request.build_absolute_uri(),
+                 *map(str, versions.get_versions(names))]
+        digest = hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+        return f'anonymous:{digest}'
@@ -0,0 +1,12 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class IgnoreFormatNegotiation(DefaultContentNegotiation):
+    """Всегда выбирает первый рендерер (JSON).
+
+    Для выгрузок параметр ?format= задаёт формат файла, а не рендерер DRF,
+    который иначе ответил бы 404 на незнакомый ему формат.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
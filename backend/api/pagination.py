@@ -1,7 +1,125 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
 from django.core import paginator
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class CustomPagination(PageNumberPagination):
+    """Постраничная пагинация с опциональным режимом курсора.
+
+    Если во view задан `cursor_ordering` и в запросе передан параметр
+    `cursor` (для первой страницы - пустой), страница выбирается условием
+    по ключу сортировки вместо OFFSET и без COUNT(*). С cursor_only
+    курсор используется всегда. Если queryset уже упорядочен иначе
+    (например, поиск - по релевантности), курсор не применяется и
+    выдача разбивается на страницы обычным образом.
+    """
+
     django_paginator_class = paginator.Paginator
     page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+    cursor_only = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering = getattr(view, 'cursor_ordering', None)
+        self.use_cursor = bool(self.ordering and (
+            self.cursor_only
+            or self.cursor_query_param in request.query_params
+        ) and self.keeps_ordering(queryset))
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        reverse, position = self.decode_cursor(
+            request.query_params.get(self.cursor_query_param, ''),
+            queryset.model)
+        ordering = self.ordering
+        if reverse:
+            ordering = [self.invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(ordering, position))
+        items = list(queryset[:self.page_size + 1])
+        has_more = len(items) > self.page_size
+        items = items[:self.page_size]
+        if reverse:
+            items.reverse()
+        self.next_position = self.previous_position = None
+        if items and (has_more or reverse):
+            self.next_position = self.get_position(items[-1])
+        if items and (has_more if reverse else position is not None):
+            self.previous_position = self.get_position(items[0])
+        return items
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_cursor_link(self.next_position, False)),
+            ('previous', self.get_cursor_link(self.previous_position, True)),
+            ('results', data)
+        ]))
+
+    def keeps_ordering(self, queryset):
+        order_by = tuple(queryset.query.order_by)
+        return not order_by or order_by == tuple(self.ordering)
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def keyset_filter(ordering, position):
+        """(a, b) после (x, y): a > x OR (a = x AND b > y) с учётом
+        направления; первое поле дополнительно ограничено диапазоном,
+        чтобы БД могла начать обход индекса с нужного места."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        first = ordering[0]
+        lookup = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{lookup}': position[0]}) & condition
+
+    def get_position(self, item):
+        return [getattr(item, field.lstrip('-')) for field in self.ordering]
+
+    def decode_cursor(self, cursor, model):
+        if not cursor:
+            return False, None
+        try:
+            data = json.loads(urlsafe_b64decode(cursor.encode()))
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, data['p'], strict=True)
+            ]
+            return bool(data['r']), position
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_cursor_link(self, position, reverse):
+        if position is None:
+            return None
+        data = json.dumps(
+            {'p': position, 'r': int(reverse)},
+            default=lambda value: value.isoformat(), separators=(',', ':'))
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param,
+            urlsafe_b64encode(data.encode()).decode())
+
+
+class FeedPagination(CustomPagination):
+    cursor_only = True
@@ -1,29 +1,46 @@
+from django.core.files.storage import default_storage
 from django.db import transaction
 from drf_base64.fields import Base64ImageField
 from rest_framework.exceptions import ValidationError
-from rest_framework.fields import (DecimalField, IntegerField,
-                                   SerializerMethodField)
+from rest_framework.fields import (DecimalField, IntegerField, ListField,
+                                   ReadOnlyField, SerializerMethodField)
 from rest_framework.relations import PrimaryKeyRelatedField
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import ModelSerializer, Serializer
 
+from apps.recipes import shopping_lists, versions
 from apps.recipes.models import (Favorite, Ingredient, Recipe,
                                  RecipeIngredient, ShoppingCart, Tag)
 from apps.users.models import User
+from foodgram.settings import BULK_RECIPES_LIMIT
+from .metrics import TimedSerializerMixin
 from .users_serializers import CustomUsersSerialiser
 
 
-class IngredientSerializer(ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, ModelSerializer):
     class Meta:
         model = Ingredient
         fields = '__all__'
 
 
-class TagSerializer(ModelSerializer):
+class TagSerializer(TimedSerializerMixin, ModelSerializer):
     class Meta:
         model = Tag
         fields = '__all__'
 
 
+class ThumbnailsField(ReadOnlyField):
+    def to_representation(self, value):
+        request = self.context.get('request')
+        urls = {}
+        for width, formats in value.items():
+            urls[width] = {}
+            for file_format, name in formats.items():
+                url = default_storage.url(name)
+                urls[width][file_format] = (
+                    request.build_absolute_uri(url) if request else url)
+        return urls
+
+
 class ShortIngredientSerializerForRecipe(ModelSerializer):
     id = IntegerField()
     amount = DecimalField(max_digits=7, decimal_places=2)
@@ -56,39 +73,88 @@ class GetIngredientRecipeSerializer(ModelSerializer):
         return obj.amount
 
 
-class RecipeReadSerializer(ModelSerializer):
+class RecipeReadSerializer(TimedSerializerMixin, ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     author = CustomUsersSerialiser(read_only=True)
     ingredients = SerializerMethodField(read_only=True)
     image = Base64ImageField(read_only=True)
+    thumbnails = ThumbnailsField()
     is_favorited = SerializerMethodField(read_only=True)
     is_in_shopping_cart = SerializerMethodField(read_only=True)
 
     class Meta:
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients', 'is_favorited',
-                  'is_in_shopping_cart', 'name', 'image', 'text',
-                  'cooking_time')
+                  'is_in_shopping_cart', 'name', 'image', 'thumbnails',
+                  'text', 'cooking_time')
+
+    # Поля карточки в списке рецептов, view=compact.
+    compact_fields = ('id', 'tags', 'author', 'name', 'image', 'thumbnails',
+                      'cooking_time')
+    fieldset_params = ('fields', 'omit', 'view')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get('recipe_fields')
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+    @classmethod
+    def select_fields(cls, query_params):
+        """Поля по параметрам fields, omit и view=compact; None - все.
+
+        fields задаёт набор полей вместо view, omit убирает поля из
+        набора. Имена перечисляются через запятую.
+        """
+        def split(param):
+            return [name for name in query_params.get(param, '').split(',')
+                    if name]
+
+        view = query_params.get('view', 'full')
+        if view not in ('full', 'compact'):
+            raise ValidationError(
+                {'view': f'Неизвестный вид: {view}. Допустимы full, compact.'})
+        selected = cls.compact_fields if view == 'compact' else cls.Meta.fields
+        if 'fields' in query_params:
+            selected = split('fields')
+        omitted = split('omit')
+        unknown = set(selected).union(omitted) - set(cls.Meta.fields)
+        if unknown:
+            raise ValidationError(
+                {'fields': f'Неизвестные поля: {", ".join(sorted(unknown))}.'})
+        fields = tuple(name for name in cls.Meta.fields
+                       if name in selected and name not in omitted)
+        return None if fields == cls.Meta.fields else fields
 
     @property
     def user(self):
         return self.context['request'].user
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return (
             self.user.is_authenticated and Favorite.objects.filter(
                 user=self.user, recipe=obj).exists()
         )
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return (
             self.user.is_authenticated and ShoppingCart.objects.filter(
                 user=self.user, recipe=obj).exists()
         )
 
     def get_ingredients(self, obj):
-        ingredients = RecipeIngredient.objects.filter(recipe=obj)
-        return GetIngredientRecipeSerializer(ingredients, many=True).data
+        return GetIngredientRecipeSerializer(
+            obj.recipes.all(), many=True).data
+
+    def to_representation(self, instance):
+        if hasattr(instance, 'is_subscribed'):
+            instance.author.is_subscribed = instance.is_subscribed
+        return super().to_representation(instance)
 
 
 class RecipeWriteSerializer(ModelSerializer):
@@ -104,26 +170,51 @@ class RecipeWriteSerializer(ModelSerializer):
 
     def validate(self, obj):
         for field in ['name', 'text', 'cooking_time']:
-            if not obj.get(field):
+            if self.is_missing(obj, field):
                 raise ValidationError(f'{field} - Обязательное поле.')
-        if not obj.get('tags'):
+        if self.is_missing(obj, 'tags'):
             raise ValidationError('Нужно указать минимум 1 тег.')
-        if not obj.get('ingredients'):
+        if self.is_missing(obj, 'ingredients'):
             raise ValidationError('Нужно указать минимум 1 ингредиент.')
-        inrgedient_id_list = [item['id'] for item in obj.get('ingredients')]
-        if len(inrgedient_id_list) != len(set(inrgedient_id_list)):
-            raise ValidationError('Ингредиенты должны быть уникальны.')
+        if 'ingredients' in obj:
+            obj['ingredients'] = self.resolve_ingredients(obj['ingredients'])
         return obj
 
-    @transaction.atomic
-    def tags_and_ingredients_set(self, recipe, tags, ingredients):
-        recipe.tags.set(tags)
-        RecipeIngredient.objects.bulk_create(
-            [RecipeIngredient(
-                recipe=recipe,
-                ingredient=Ingredient.objects.get(pk=ingredient['id']),
-                amount=ingredient['amount']
-            ) for ingredient in ingredients])
+    def is_missing(self, obj, field):
+        return not obj.get(field) and (field in obj or not self.partial)
+
+    def resolve_ingredients(self, items):
+        inrgedient_id_list = [item['id'] for item in items]
+        if len(inrgedient_id_list) != len(set(inrgedient_id_list)):
+            raise ValidationError('Ингредиенты должны быть уникальны.')
+        ingredients = Ingredient.objects.in_bulk(inrgedient_id_list)
+        unknown = [str(pk) for pk in inrgedient_id_list
+                   if pk not in ingredients]
+        if unknown:
+            raise ValidationError({'ingredients': (
+                f'Ингредиенты не найдены: {", ".join(unknown)}.')})
+        return [{'ingredient': ingredients[item['id']],
+                 'amount': item['amount']} for item in items]
+
+    def set_ingredients(self, recipe, ingredients):
+        current = {item.ingredient_id: item for item in recipe.recipes.all()}
+        created, changed = [], []
+        for item in ingredients:
+            row = current.pop(item['ingredient'].id, None)
+            if row is None:
+                created.append(RecipeIngredient(
+                    recipe=recipe, ingredient=item['ingredient'],
+                    amount=item['amount']))
+            elif row.amount != item['amount']:
+                row.amount = item['amount']
+                changed.append(row)
+        if current:
+            RecipeIngredient.objects.filter(
+                pk__in=[row.pk for row in current.values()]).delete()
+        if created:
+            RecipeIngredient.objects.bulk_create(created)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
 
     @transaction.atomic
     def create(self, validated_data):
@@ -131,47 +222,64 @@ class RecipeWriteSerializer(ModelSerializer):
         ingredients = validated_data.pop('ingredients')
         recipe = Recipe.objects.create(author=self.context['request'].user,
                                        **validated_data)
-        self.tags_and_ingredients_set(recipe, tags, ingredients)
+        recipe.tags.add(*tags)
+        RecipeIngredient.objects.bulk_create(
+            [RecipeIngredient(
+                recipe=recipe,
+                ingredient=ingredient['ingredient'],
+                amount=ingredient['amount']
+            ) for ingredient in ingredients])
         return recipe
 
     @transaction.atomic
     def update(self, instance, validated_data):
-        instance.image = validated_data.get('image', instance.image)
-        instance.name = validated_data.get('name', instance.name)
-        instance.text = validated_data.get('text', instance.text)
-        instance.cooking_time = validated_data.get(
-            'cooking_time', instance.cooking_time)
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredients')
-        RecipeIngredient.objects.filter(
-            recipe=instance,
-            ingredient__in=instance.ingredients.all()).delete()
-        self.tags_and_ingredients_set(instance, tags, ingredients)
-        instance.save()
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
+        changed = [field for field, value in validated_data.items()
+                   if getattr(instance, field) != value]
+        for field in changed:
+            setattr(instance, field, validated_data[field])
+        if changed:
+            instance.save(update_fields=changed)
+        if tags is not None:
+            instance.tags.set(tags)
+        if ingredients is not None:
+            with shopping_lists.recipe_changing(instance.pk):
+                self.set_ingredients(instance, ingredients)
+        # bulk_create и bulk_update не отправляют сигналов.
+        versions.bump_on_commit(
+            versions.RECIPES, versions.recipe(instance.pk))
         return instance
 
     def to_representation(self, instance):
+        instance = Recipe.objects.for_read(
+            self.context['request'].user).get(pk=instance.pk)
         return RecipeReadSerializer(instance, context=self.context).data
 
 
-class RecipeShortSerializer(ModelSerializer):
+class RecipeShortSerializer(TimedSerializerMixin, ModelSerializer):
+    thumbnails = ThumbnailsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'thumbnails', 'cooking_time')
 
 
-class FollowSerializer(ModelSerializer):
+class RecipeIdsSerializer(Serializer):
+    """Ключи рецептов для пакетных операций с избранным и корзиной."""
+    recipes = ListField(child=IntegerField(min_value=1), allow_empty=False,
+                        max_length=BULK_RECIPES_LIMIT)
+
+
+class FollowSerializer(TimedSerializerMixin, ModelSerializer):
     recipes = RecipeShortSerializer(many=True, read_only=True)
-    recipes_count = SerializerMethodField(read_only=True)
     is_subscribed = SerializerMethodField(read_only=True)
 
-    @staticmethod
-    def get_recipes_count(author):
-        return author.recipes.count()
-
     def get_is_subscribed(self, author):
+        if hasattr(author, 'is_subscribed'):
+            return author.is_subscribed
         user = self.context['request'].user
-        return bool(author.follower.filter(user=user))
+        return author.following.filter(user=user).exists()
 
     class Meta:
         model = User
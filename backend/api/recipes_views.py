@@ -1,51 +1,67 @@
-from datetime import datetime
-import io
-
 from django.http import FileResponse
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
-
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase.pdfmetrics import registerFont
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen.canvas import Canvas
-from rest_framework import filters, status, viewsets
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
 
-from apps.recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from apps.recipes import feeds, relations, versions
+from apps.recipes.models import (Favorite, Ingredient, Recipe, ShoppingCart,
+                                 ShoppingListItem, Tag)
 from foodgram.settings import FILE_NAME
-from .filters import RecipeFilter
-from .pagination import CustomPagination
+from . import metrics, shopping_list
+from .filters import IngredientSearchFilter, RecipeFilter
+from .mixins import AnonymousCacheMixin, ReferenceCacheMixin
+from .negotiation import IgnoreFormatNegotiation
+from .pagination import CustomPagination, FeedPagination
 from .permissions import IsAuthorOrReadOnly
-from .recipes_serializers import (IngredientSerializer, RecipeReadSerializer,
-                                  RecipeShortSerializer, RecipeWriteSerializer,
-                                  TagSerializer)
+from .recipes_serializers import (IngredientSerializer, RecipeIdsSerializer,
+                                  RecipeReadSerializer, RecipeShortSerializer,
+                                  RecipeWriteSerializer, TagSerializer)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ReferenceCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = (filters.SearchFilter,)
+    filter_backends = (IngredientSearchFilter,)
     pagination_class = None
-    search_fields = ('name',)
+    version_name = versions.INGREDIENTS
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ReferenceCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+    version_name = versions.TAGS
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(AnonymousCacheMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     pagination_class = CustomPagination
     permission_classes = (IsAuthorOrReadOnly, )
     filter_backends = (DjangoFilterBackend, )
     filterset_class = RecipeFilter
+    cursor_ordering = ('-pub_date', '-id')
     http_method_names = ['get', 'post', 'patch', 'create', 'delete']
 
+    def get_queryset(self):
+        if self.request.method in SAFE_METHODS:
+            return Recipe.objects.for_read(
+                self.request.user, self.read_fields)
+        return Recipe.objects.all()
+
+    @cached_property
+    def read_fields(self):
+        return RecipeReadSerializer.select_fields(self.request.query_params)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.method in SAFE_METHODS:
+            context['recipe_fields'] = self.read_fields
+        return context
+
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return RecipeReadSerializer
@@ -74,62 +90,81 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return self.delete_from(ShoppingCart, request.user, pk)
 
     @action(detail=False, methods=['get'],
+            permission_classes=(IsAuthenticated,),
+            pagination_class=FeedPagination, cursor_ordering=feeds.ORDERING)
+    def feed(self, request):
+        """Рецепты авторов из подписок, от новых к старым."""
+        entries = self.paginate_queryset(feeds.get_entries(request.user))
+        recipes = Recipe.objects.for_read(
+            request.user, self.read_fields).in_bulk(
+            [entry.recipe_id for entry in entries])
+        serializer = RecipeReadSerializer(
+            [recipes[entry.recipe_id] for entry in entries], many=True,
+            context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['post', 'delete'], url_path='favorite',
             permission_classes=(IsAuthenticated,))
+    def favorite_many(self, request):
+        return self.change_many(Favorite, request)
+
+    @action(detail=False, methods=['post', 'delete'],
+            url_path='shopping_cart', permission_classes=(IsAuthenticated,))
+    def shopping_cart_many(self, request):
+        return self.change_many(ShoppingCart, request)
+
+    @action(detail=False, methods=['get'],
+            permission_classes=(IsAuthenticated,),
+            content_negotiation_class=IgnoreFormatNegotiation)
     def download_shopping_cart(self, request):
-        ingredients = ShoppingCart.objects.ingredients(request)
-        if not ingredients:
+        file_format = request.query_params.get('format', 'pdf')
+        if file_format not in shopping_list.FORMATS:
+            return Response(
+                {'errors': f'Неизвестный формат: {file_format}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not ShoppingCart.objects.filter(user=request.user).exists():
             return Response(
                 {'errors': 'В Корзине отсутствуют рецепты'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        shopping_list_title = [
-            f'Список покупок для: {request.user.get_full_name()}',
-            f'Дата: {datetime.now().strftime("%A, %d-%m-%Y")}'
-        ]
-        shopping_list_body = []
-        for ingredient in ingredients:
-            s = str(ingredient['amount'])
-            ingredient['amount'] = s.rstrip('0').rstrip('.') if '.' in s else s
-            shopping_list_body.append(
-                ' - {ingredient__name} ({ingredient__measurement_unit})'
-                ' - {amount}'.format(**ingredient))
-
-        registerFont(TTFont('Arial', 'font/arial.ttf'))
-        registerFont(TTFont('Arialbd', 'font/arialbd.ttf'))
-        buffer = io.BytesIO()
-        canvas = Canvas(buffer, pagesize=A4, bottomup=0)
-        x = 50
-        y = 50
-        delta = 20
-
-        canvas.setFont('Arialbd', 16)
-        for string in shopping_list_title:
-            canvas.drawString(x, y, string)
-            y += delta
-
-        y += 30
-        canvas.setFont('Arial', 12)
-        for string in shopping_list_body:
-            canvas.drawString(x, y, string)
-            y += delta
-        canvas.showPage()
-        canvas.save()
-        buffer.seek(0)
-        return FileResponse(buffer, as_attachment=True, filename=FILE_NAME)
+        ingredients = ShoppingListItem.objects.for_download(request.user)
+        title = shopping_list.get_title(request.user)
+        filename = f'{FILE_NAME}.{file_format}'
+        if file_format != 'pdf':
+            return shopping_list.stream(
+                file_format, title, ingredients, filename)
+        body = [shopping_list.get_line(ingredient)
+                for ingredient in ingredients]
+        with metrics.span('pdf'):
+            pdf = shopping_list.get_pdf(title, body)
+        return FileResponse(pdf, as_attachment=True, filename=filename)
 
     def add_to(self, model, user, pk):
-        if model.objects.filter(user=user, recipe__id=pk).exists():
+        recipe = self.get_recipe(pk)
+        if not relations.add(model, user.pk, [recipe.pk]):
             return Response({'errors': 'Рецепт уже добавлен!'},
                             status=status.HTTP_400_BAD_REQUEST)
-        recipe = get_object_or_404(Recipe, id=pk)
-        model.objects.create(user=user, recipe=recipe)
         serializer = RecipeShortSerializer(recipe)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete_from(self, model, user, pk):
-        obj = model.objects.filter(user=user, recipe__id=pk)
-        if obj.exists():
-            obj.delete()
+        if relations.remove(model, user.pk, [pk]):
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response({'errors': 'Рецепт уже удален!'},
                         status=status.HTTP_400_BAD_REQUEST)
+
+    def change_many(self, model, request):
+        """Пакетно добавляет (POST) или убирает (DELETE) рецепты.
+
+        Отвечает ключами рецептов, которые действительно изменились:
+        уже добавленные, уже удалённые и несуществующие пропускаются.
+        """
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        if request.method == 'POST':
+            added = relations.add(model, request.user.pk, recipe_ids)
+            return Response({'added': added}, status=status.HTTP_201_CREATED)
+        removed = relations.remove(model, request.user.pk, recipe_ids)
+        return Response({'removed': removed}, status=status.HTTP_200_OK)
@@ -0,0 +1,148 @@
+import csv
+import hashlib
+import io
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import registerFont
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+
+from foodgram.settings import BASE_DIR, SHOPPING_LIST_CACHE_TIMEOUT
+
+FONT = 'Arial'
+FONT_BOLD = 'Arialbd'
+TITLE_FONT_SIZE = 16
+BODY_FONT_SIZE = 12
+MARGIN = 50
+LINE_HEIGHT = 20
+TITLE_GAP = 30
+# Строк в одном куске потокового ответа.
+CHUNK_LINES = 500
+CSV_HEADER = ('Ингредиент', 'Единица измерения', 'Количество')
+CONTENT_TYPES = {
+    'txt': 'text/plain; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+FORMATS = ('pdf', *CONTENT_TYPES)
+
+
+@lru_cache(maxsize=None)
+def register_fonts():
+    """Разбирает TTF-шрифты один раз за время жизни процесса."""
+    registerFont(TTFont(FONT, str(BASE_DIR / 'font' / 'arial.ttf')))
+    registerFont(TTFont(FONT_BOLD, str(BASE_DIR / 'font' / 'arialbd.ttf')))
+
+
+def format_amount(amount):
+    s = str(amount)
+    return s.rstrip('0').rstrip('.') if '.' in s else s
+
+
+def get_title(user):
+    return [
+        f'Список покупок для: {user.get_full_name()}',
+        f'Дата: {datetime.now().strftime("%A, %d-%m-%Y")}'
+    ]
+
+
+def get_line(ingredient):
+    return (f' - {ingredient["ingredient__name"]} '
+            f'({ingredient["ingredient__measurement_unit"]}) '
+            f'- {format_amount(ingredient["amount"])}')
+
+
+def fingerprint(title, body):
+    digest = hashlib.sha256()
+    for line in (*title, '', *body):
+        digest.update(line.encode())
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def render(title, body, file):
+    register_fonts()
+    canvas = Canvas(file, pagesize=A4, bottomup=0)
+    bottom = A4[1] - MARGIN
+    y = MARGIN
+
+    canvas.setFont(FONT_BOLD, TITLE_FONT_SIZE)
+    for line in title:
+        canvas.drawString(MARGIN, y, line)
+        y += LINE_HEIGHT
+
+    y += TITLE_GAP
+    canvas.setFont(FONT, BODY_FONT_SIZE)
+    for line in body:
+        if y > bottom:
+            canvas.showPage()
+            canvas.setFont(FONT, BODY_FONT_SIZE)
+            y = MARGIN
+        canvas.drawString(MARGIN, y, line)
+        y += LINE_HEIGHT
+    canvas.showPage()
+    canvas.save()
+
+
+def get_pdf(title, body):
+    """Возвращает PDF-файл списка покупок, используя кэш по содержимому."""
+    key = f'shopping_list:{fingerprint(title, body)}'
+    pdf = cache.get(key)
+    if pdf is None:
+        buffer = io.BytesIO()
+        render(title, body, buffer)
+        pdf = buffer.getvalue()
+        cache.set(key, pdf, SHOPPING_LIST_CACHE_TIMEOUT)
+    return io.BytesIO(pdf)
+
+
+class Echo:
+    """Файл для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def iter_txt(title, ingredients):
+    for line in title:
+        yield f'{line}\n'
+    yield '\n'
+    for ingredient in ingredients:
+        yield f'{get_line(ingredient)}\n'
+
+
+def iter_csv(title, ingredients):
+    writer = csv.writer(Echo())
+    # BOM нужен Excel, чтобы прочитать файл в UTF-8.
+    yield '\ufeff' + writer.writerow(CSV_HEADER)
+    for ingredient in ingredients:
+        yield writer.writerow((
+            ingredient['ingredient__name'],
+            ingredient['ingredient__measurement_unit'],
+            format_amount(ingredient['amount'])
+        ))
+
+
+ITERATORS = {'txt': iter_txt, 'csv': iter_csv}
+
+
+def join_chunks(lines, size=CHUNK_LINES):
+    lines = iter(lines)
+    while chunk := ''.join(islice(lines, size)):
+        yield chunk.encode()
+
+
+def stream(file_format, title, ingredients, filename):
+    """Отдаёт список построчно, читая ингредиенты курсором."""
+    response = StreamingHttpResponse(
+        join_chunks(ITERATORS[file_format](
+            title, ingredients.iterator(chunk_size=CHUNK_LINES))),
+        content_type=CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = content_disposition_header(
+        True, filename)
+    return response
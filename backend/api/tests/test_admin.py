@@ -0,0 +1,72 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.recipes.models import (Favorite, Ingredient, Recipe,
+                                 RecipeIngredient, ShoppingCart, Tag)
+from apps.users.models import Follow, User
+
+CHANGELISTS = (
+    '/admin/recipes/recipe/',
+    '/admin/recipes/recipeingredient/',
+    '/admin/recipes/favorite/',
+    '/admin/recipes/shoppingcart/',
+    '/admin/recipes/ingredient/',
+    '/admin/users/user/',
+    '/admin/users/follow/',
+)
+
+
+class AdminTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            email='admin@test.ru', username='admin',
+            first_name='Админ', last_name='Тестов', password='pass')
+        cls.tags = Tag.objects.bulk_create(
+            Tag(name=f'Тег {i}', color='#000000', slug=f'tag{i}')
+            for i in range(3))
+        cls.ingredient = Ingredient.objects.create(name='Соль',
+                                                   measurement_unit='г')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        for _ in range(count):
+            number = User.objects.count()
+            user = User.objects.create_user(
+                email=f'user{number}@test.ru', username=f'user{number}',
+                first_name='Имя', last_name='Фамилия', password='pass')
+            recipe = Recipe.objects.create(
+                author=user, name=f'Рецепт {number}', text='Текст',
+                cooking_time=10)
+            recipe.tags.set(self.tags)
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=self.ingredient, amount=1)
+            Favorite.objects.create(user=self.admin, recipe=recipe)
+            ShoppingCart.objects.create(user=self.admin, recipe=recipe)
+            Follow.objects.create(user=self.admin, author=user)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.add_rows(2)
+        small = [self.count_queries(url) for url in CHANGELISTS]
+        self.add_rows(8)
+        large = [self.count_queries(url) for url in CHANGELISTS]
+        self.assertEqual(dict(zip(CHANGELISTS, small)),
+                         dict(zip(CHANGELISTS, large)))
+
+    def test_foreign_keys_are_not_rendered_as_selects(self):
+        self.add_rows(1)
+        response = self.client.get('/admin/recipes/recipe/add/')
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, f'>{self.ingredient}</option>')
+        self.assertNotContains(response, '>Имя Фамилия</option>')
+        response = self.client.get('/admin/recipes/favorite/add/')
+        self.assertContains(response, 'vForeignKeyRawIdAdminField')
@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.mixins import AnonymousCacheMixin
+from apps.recipes.models import Recipe
+from apps.users.models import User
+
+RECIPES_URL = '/api/recipes/'
+
+
+class AnonymousCacheTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@test.ru', username='author',
+            first_name='Автор', last_name='Тестов', password='pass')
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Суп', text='Текст', cooking_time=10)
+
+    def setUp(self):
+        cache.clear()
+        AnonymousCacheMixin.stats.clear()
+
+    def test_repeated_request_is_served_from_cache(self):
+        url = f'{RECIPES_URL}{self.recipe.pk}/'
+        first = self.client.get(url)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(AnonymousCacheMixin.stats,
+                         {'hits': 1, 'misses': 1})
+
+    def test_change_invalidates_cached_response(self):
+        url = f'{RECIPES_URL}{self.recipe.pk}/'
+        self.client.get(url)
+        self.client.get(RECIPES_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.name = 'Борщ'
+            self.recipe.save(update_fields=['name'])
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['name'], 'Борщ')
+        response = self.client.get(RECIPES_URL)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['name'], 'Борщ')
+
+    def test_registration_keeps_cached_responses(self):
+        self.client.get(RECIPES_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(
+                email='new@test.ru', username='new', first_name='Имя',
+                last_name='Фамилия', password='pass')
+        self.assertEqual(self.client.get(RECIPES_URL)['X-Cache'], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.first_name = 'Повар'
+            self.author.save()
+        response = self.client.get(RECIPES_URL)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(
+            response.data['results'][0]['author']['first_name'], 'Повар')
+
+    def test_query_params_are_part_of_key(self):
+        self.client.get(RECIPES_URL, {'limit': 1})
+        response = self.client.get(RECIPES_URL, {'limit': 2})
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_authenticated_user_bypasses_cache(self):
+        self.client.get(RECIPES_URL)
+        self.client.force_authenticate(self.author)
+        response = self.client.get(RECIPES_URL)
+        self.assertNotIn('X-Cache', response)
+        self.assertEqual(AnonymousCacheMixin.stats, {'misses': 1})
@@ -0,0 +1,131 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APITestCase
+
+from api import async_views
+from apps.recipes.models import (Favorite, Ingredient, Recipe,
+                                 RecipeIngredient, Tag)
+from apps.users.models import Follow, User
+
+
+class AsyncViewsTestCase(APITestCase):
+    """Асинхронные представления отвечают так же, как синхронные."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='reader@test.ru', username='reader',
+            first_name='Читатель', last_name='Тестов', password='pass')
+        cls.token = Token.objects.create(user=cls.user)
+        tags = Tag.objects.bulk_create(
+            Tag(name=f'Тег {i}', color='#000000', slug=f'tag{i}')
+            for i in range(2))
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in ('молоко', 'мука', 'соль'))
+        for i in range(5):
+            author = User.objects.create_user(
+                email=f'author{i}@test.ru', username=f'author{i}',
+                first_name='Автор', last_name='Тестов', password='pass')
+            recipe = Recipe.objects.create(
+                author=author, name=f'Блины {i}', text='Тесто',
+                cooking_time=10)
+            recipe.tags.set(tags[:i % 2 + 1])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=i + 1)
+                for ingredient in ingredients)
+            Follow.objects.create(user=cls.user, author=author)
+            if i % 2:
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+        cls.recipe = recipe
+
+    def get(self, urlconf, url, **headers):
+        cache.clear()
+        with self.settings(ROOT_URLCONF=urlconf):
+            return self.client.get(url, **headers)
+
+    def assertSameResponse(self, url, served_async=True, **headers):
+        expected = self.get('foodgram.urls', url, **headers)
+        with mock.patch.object(async_views, 'call_sync_view',
+                               wraps=async_views.call_sync_view) as sync:
+            response = self.get('foodgram.async_urls', url, **headers)
+        self.assertEqual(not sync.called, served_async, url)
+        self.assertEqual(response.status_code, expected.status_code, url)
+        self.assertEqual(response.json(), expected.json(), url)
+        return response
+
+    def assertAllSame(self, urls, served_async=True):
+        for url in urls:
+            for headers in ({}, {'HTTP_AUTHORIZATION':
+                                 f'Token {self.token.key}'}):
+                with self.subTest(url=url, headers=headers):
+                    self.assertSameResponse(url, served_async, **headers)
+
+    def test_responses_match_sync_views(self):
+        self.assertAllSame((
+            '/api/recipes/',
+            '/api/recipes/?page=2&limit=2',
+            '/api/recipes/?tags=tag1&is_favorited=1',
+            '/api/recipes/?search=блины',
+            f'/api/recipes/{self.recipe.pk}/',
+            '/api/tags/',
+            '/api/ingredients/',
+            '/api/ingredients/?name=му',
+        ))
+        self.assertSameResponse(
+            '/api/users/subscriptions/?recipes_limit=1',
+            HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertSameResponse(
+            '/api/users/subscriptions/?page=2&limit=3',
+            HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_unsupported_requests_fall_back_to_sync_views(self):
+        self.assertAllSame((
+            '/api/recipes/?page=9',
+            '/api/recipes/?cursor=',
+            '/api/recipes/?author=abc',
+            '/api/recipes/0/',
+        ), served_async=False)
+        self.assertSameResponse('/api/users/subscriptions/',
+                                served_async=False)
+
+    def test_invalid_token_is_rejected(self):
+        for url in ('/api/recipes/', '/api/tags/'):
+            for header in ('Token wrong', 'Token', 'Token a b'):
+                with self.subTest(url=url, header=header):
+                    response = self.assertSameResponse(
+                        url, served_async=False, HTTP_AUTHORIZATION=header)
+                    self.assertEqual(response.status_code, 401)
+
+    def test_other_methods_use_sync_views(self):
+        with self.settings(ROOT_URLCONF='foodgram.async_urls'):
+            response = self.client.post(
+                f'/api/recipes/{self.recipe.pk}/favorite/',
+                HTTP_AUTHORIZATION=f'Token {self.token.key}')
+            self.assertEqual(response.status_code, 201)
+            response = self.client.post('/api/recipes/', {})
+            self.assertEqual(response.status_code, 401)
+
+    @override_settings(ROOT_URLCONF='foodgram.async_urls')
+    async def test_async_client(self):
+        response = await self.async_client.get(
+            '/api/recipes/', headers={
+                'Authorization': f'Token {self.token.key}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 5)
+
+    async def test_paginate_uses_async_orm(self):
+        # Синхронный запрос к базе здесь упал бы с SynchronousOnlyOperation.
+        request = Request(RequestFactory().get('/api/recipes/?page=2&limit=2'))
+        data = await async_views.paginate(
+            request, Recipe.objects.order_by('pk'),
+            lambda recipes: [recipe.name for recipe in recipes])
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(data['results'], ['Блины 2', 'Блины 3'])
+        self.assertTrue(data['next'].endswith('?limit=2&page=3'))
+        self.assertTrue(data['previous'].endswith('?limit=2'))
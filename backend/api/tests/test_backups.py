@@ -0,0 +1,100 @@
+import gzip
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from api.tests.utils import create_user
+from apps.recipes import backups
+from apps.recipes.models import (Favorite, FeedEntry, Ingredient, Recipe,
+                                 RecipeIngredient, ShoppingCart,
+                                 ShoppingListItem, Tag)
+from apps.users.models import Follow, User
+
+
+class BackupTestCase(TransactionTestCase):
+    """Копия и восстановление без потерь, полная и инкрементальная."""
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.tag = Tag.objects.create(name='Обед', color='#49B64E',
+                                      slug='lunch')
+        self.ingredient = Ingredient.objects.create(name='мука',
+                                                    measurement_unit='г')
+        self.user = create_user('reader')
+        self.author = create_user('author')
+        self.recipe = self.create_recipe('Блины')
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        Follow.objects.create(user=self.user, author=self.author)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def create_recipe(self, name):
+        recipe = Recipe.objects.create(
+            author=self.author, name=name, text='Текст', cooking_time=10)
+        recipe.tags.add(self.tag)
+        RecipeIngredient.objects.create(
+            recipe=recipe, ingredient=self.ingredient, amount='150.50')
+        return recipe
+
+    def snapshot(self):
+        return {model: list(model.objects.order_by('pk').values())
+                for model in (User, Tag, Ingredient, Recipe,
+                              Recipe.tags.through, RecipeIngredient,
+                              Favorite, ShoppingCart, ShoppingListItem,
+                              Follow, FeedEntry)}
+
+    def flush(self):
+        for model in reversed(backups.get_models()):
+            model._base_manager.all()._raw_delete(model.objects.db)
+
+    def test_full_backup_round_trip(self):
+        expected = self.snapshot()
+        call_command('dbackup', f'--output={self.directory}', '--jobs=4',
+                     stdout=StringIO())
+        with gzip.open(self.directory / 'recipes.recipe.jsonl.gz', 'rt',
+                       encoding='utf-8') as file:
+            self.assertEqual(len(file.readlines()), 1)
+        self.flush()
+        call_command('dbrestore', str(self.directory), '--batch-size=1',
+                     stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+        recipe = self.create_recipe('Новый')
+        self.assertGreater(recipe.pk, self.recipe.pk)
+
+    def test_incremental_backup(self):
+        full = self.directory / 'full'
+        increment = self.directory / 'increment'
+        call_command('dbackup', f'--output={full}', '--jobs=1',
+                     stdout=StringIO())
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            pub_date=timezone.now() - timedelta(days=1))
+        reader = create_user('new_reader')
+        create_user('new_author')
+        self.create_recipe('Оладьи')
+        expected = self.snapshot()
+        call_command('dbackup', f'--output={increment}',
+                     f'--incremental={full}', stdout=StringIO())
+        counts = {table['model']: table['count'] for table
+                  in backups.read_manifest(increment)['models']}
+        self.assertEqual(counts['recipes.recipe'], 1)
+        self.assertEqual(counts['recipes.recipeingredient'], 1)
+        # Из двух записей ленты читателя новая только у нового рецепта.
+        self.assertEqual(FeedEntry.objects.count(), 2)
+        self.assertEqual(counts['recipes.feedentry'], 1)
+        # В копию попали только двое новых из четырёх пользователей.
+        self.assertEqual(User.objects.count(), 4)
+        self.assertEqual(counts['users.user'], 2)
+        self.flush()
+        call_command('dbrestore', str(full), str(increment),
+                     stdout=StringIO())
+        expected[Recipe][0]['pub_date'] = self.recipe.pub_date
+        self.assertEqual(self.snapshot(), expected)
+        self.assertTrue(User.objects.filter(pk=reader.pk).exists())
@@ -0,0 +1,105 @@
+from io import StringIO
+
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.recipes.models import (Favorite, Ingredient, Recipe,
+                                 RecipeIngredient, ShoppingListItem)
+from apps.users.models import User
+from foodgram.settings import BULK_RECIPES_LIMIT
+
+RECIPES_URL = '/api/recipes/'
+
+
+class BulkRelationsTestCase(APITestCase):
+    """Избранное и корзина меняются пачкой, повторы не дают 500."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='buyer@test.ru', username='buyer',
+            first_name='Имя', last_name='Фамилия', password='pass')
+        cls.flour = Ingredient.objects.create(name='мука',
+                                              measurement_unit='г')
+        cls.recipes = [
+            Recipe.objects.create(author=cls.user, name=f'Рецепт {number}',
+                                  text='Текст', cooking_time=10)
+            for number in range(3)]
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=cls.flour, amount=100)
+            for recipe in cls.recipes)
+        cls.ids = [recipe.pk for recipe in cls.recipes]
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def assertShoppingList(self, amount):
+        items = ShoppingListItem.objects.filter(user=self.user)
+        self.assertEqual(list(items.values_list('amount', flat=True)),
+                         [amount] if amount else [])
+        call_command('check_shopping_lists', stdout=StringIO())
+
+    def test_single_add_twice(self):
+        url = f'{RECIPES_URL}{self.ids[0]}/shopping_cart/'
+        self.assertEqual(self.client.post(url).status_code,
+                         status.HTTP_201_CREATED)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            Recipe.objects.get(pk=self.ids[0]).in_carts_count, 1)
+        self.assertShoppingList(100)
+        self.assertEqual(self.client.delete(url).status_code,
+                         status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.delete(url).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertShoppingList(None)
+
+    def test_single_add_missing_recipe(self):
+        response = self.client.post(f'{RECIPES_URL}0/favorite/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bulk_cart(self):
+        self.client.post(f'{RECIPES_URL}{self.ids[0]}/shopping_cart/')
+        url = f'{RECIPES_URL}shopping_cart/'
+        with self.assertNumQueries(5):
+            response = self.client.post(url, {'recipes': [
+                *self.ids, self.ids[1], self.ids[-1] + 1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'added': self.ids[1:]})
+        self.assertShoppingList(300)
+        self.assertEqual(
+            list(Recipe.objects.filter(pk__in=self.ids).order_by('pk')
+                 .values_list('in_carts_count', flat=True)), [1, 1, 1])
+        response = self.client.delete(url, {'recipes': self.ids[:2]},
+                                      format='json')
+        self.assertEqual(response.data, {'removed': self.ids[:2]})
+        self.assertShoppingList(100)
+
+    def test_bulk_favorites(self):
+        url = f'{RECIPES_URL}favorite/'
+        response = self.client.post(url, {'recipes': self.ids},
+                                    format='json')
+        self.assertEqual(response.data, {'added': self.ids})
+        self.assertEqual(Favorite.objects.filter(user=self.user).count(), 3)
+        response = self.client.post(url, {'recipes': self.ids},
+                                    format='json')
+        self.assertEqual(response.data, {'added': []})
+        response = self.client.delete(url, {'recipes': self.ids},
+                                      format='json')
+        self.assertEqual(response.data, {'removed': self.ids})
+        self.assertEqual(
+            list(Recipe.objects.filter(pk__in=self.ids)
+                 .values_list('favorites_count', flat=True)), [0, 0, 0])
+
+    def test_bulk_validation(self):
+        url = f'{RECIPES_URL}favorite/'
+        for recipes in ([], ['x'], [1] * (BULK_RECIPES_LIMIT + 1)):
+            response = self.client.post(url, {'recipes': recipes},
+                                        format='json')
+            self.assertEqual(response.status_code,
+                             status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(None)
+        response = self.client.post(url, {'recipes': self.ids},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
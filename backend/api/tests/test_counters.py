@@ -0,0 +1,115 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.tests.utils import create_user
+from apps.recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from apps.users.models import Follow
+
+RECIPES_URL = '/api/recipes/'
+IMAGE = ('data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAf'
+         'FcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg==')
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class CountersTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.author = create_user('author')
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Суп', text='Текст', cooking_time=10)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def assertCounters(self, **expected):
+        self.recipe.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual({
+            'favorites_count': self.recipe.favorites_count,
+            'in_carts_count': self.recipe.in_carts_count,
+            'recipes_count': self.author.recipes_count,
+            'followers_count': self.author.followers_count,
+        }, expected)
+
+    def test_favorite_and_shopping_cart(self):
+        url = f'{RECIPES_URL}{self.recipe.pk}/'
+        self.client.post(f'{url}favorite/')
+        self.client.post(f'{url}favorite/')
+        self.client.post(f'{url}shopping_cart/')
+        self.assertCounters(favorites_count=1, in_carts_count=1,
+                            recipes_count=1, followers_count=0)
+        self.client.delete(f'{url}favorite/')
+        self.client.delete(f'{url}favorite/')
+        self.client.delete(f'{url}shopping_cart/')
+        self.assertCounters(favorites_count=0, in_carts_count=0,
+                            recipes_count=1, followers_count=0)
+
+    def test_subscribe(self):
+        url = f'/api/users/{self.author.pk}/subscribe/'
+        self.client.post(url)
+        self.client.post(url)
+        self.assertCounters(favorites_count=0, in_carts_count=0,
+                            recipes_count=1, followers_count=1)
+        self.client.delete(url)
+        self.assertCounters(favorites_count=0, in_carts_count=0,
+                            recipes_count=1, followers_count=0)
+
+    def test_create_and_delete_recipe(self):
+        self.client.force_authenticate(self.author)
+        tag = Tag.objects.create(name='Обед', color='#49B64E', slug='lunch')
+        ingredient = Ingredient.objects.create(name='Соль',
+                                               measurement_unit='г')
+        response = self.client.post(RECIPES_URL, {
+            'name': 'Борщ', 'text': 'Текст', 'cooking_time': 30,
+            'image': IMAGE, 'tags': [tag.pk],
+            'ingredients': [{'id': ingredient.pk, 'amount': 5}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertCounters(favorites_count=0, in_carts_count=0,
+                            recipes_count=2, followers_count=0)
+        self.client.delete(f'{RECIPES_URL}{response.data["id"]}/')
+        self.assertCounters(favorites_count=0, in_carts_count=0,
+                            recipes_count=1, followers_count=0)
+
+    def test_model_writes_outside_api(self):
+        # Так пишут админка и shell: счётчики меняют сигналы моделей.
+        favorite = Favorite.objects.create(user=self.user,
+                                           recipe=self.recipe)
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        Follow.objects.create(user=self.user, author=self.author)
+        recipe = Recipe.objects.create(author=self.author, name='Борщ',
+                                       text='Текст', cooking_time=10)
+        self.assertCounters(favorites_count=1, in_carts_count=1,
+                            recipes_count=2, followers_count=1)
+        favorite.delete()
+        recipe.delete()
+        self.user.delete()
+        self.assertCounters(favorites_count=0, in_carts_count=0,
+                            recipes_count=1, followers_count=0)
+
+    def test_repair_counters(self):
+        # bulk_create не отправляет сигналов - счётчик автора отстаёт.
+        Recipe.objects.bulk_create([Recipe(
+            author=self.author, name='Борщ', text='Текст', cooking_time=10)])
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        Follow.objects.create(user=self.user, author=self.author)
+        Recipe.objects.filter(pk=self.recipe.pk).update(in_carts_count=3)
+        out = StringIO()
+        call_command('repair_counters', '--batch-size=1', stdout=out)
+        self.assertIn('Recipe.in_carts_count: drifted 1', out.getvalue())
+        self.assertIn('User.recipes_count: drifted 1', out.getvalue())
+        self.assertCounters(favorites_count=1, in_carts_count=0,
+                            recipes_count=2, followers_count=1)
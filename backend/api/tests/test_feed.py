@@ -0,0 +1,117 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.tests.utils import create_user
+from apps.recipes import feeds
+from apps.recipes.models import FeedEntry, Recipe
+from apps.users.models import Follow
+
+FEED_URL = '/api/recipes/feed/'
+
+
+def create_recipe(author, name):
+    return Recipe.objects.create(author=author, name=name, text='Текст',
+                                 cooking_time=10)
+
+
+class FeedTestCase(APITestCase):
+    """Лента собирается из рецептов авторов, на которых подписан читатель."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        cls.cook = create_user('cook')
+        cls.star = create_user('star')
+        cls.stranger = create_user('stranger')
+        cls.old = create_recipe(cls.cook, 'Старый рецепт')
+
+    def setUp(self):
+        self.client.force_authenticate(self.reader)
+
+    def subscribe(self, author):
+        response = self.client.post(f'/api/users/{author.pk}/subscribe/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def get_feed(self, url=FEED_URL):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def names(self, response):
+        return [recipe['name'] for recipe in response.data['results']]
+
+    def test_fan_out_and_backfill(self):
+        self.subscribe(self.cook)
+        create_recipe(self.cook, 'Новый рецепт')
+        create_recipe(self.stranger, 'Чужой рецепт')
+        self.assertEqual(self.names(self.get_feed()),
+                         ['Новый рецепт', 'Старый рецепт'])
+        self.client.delete(f'/api/users/{self.cook.pk}/subscribe/')
+        self.assertEqual(self.names(self.get_feed()), [])
+
+    def test_cursor_pages(self):
+        self.subscribe(self.cook)
+        for number in range(4):
+            create_recipe(self.cook, f'Рецепт {number}')
+        first = self.get_feed(f'{FEED_URL}?limit=3')
+        self.assertNotIn('count', first.data)
+        self.assertEqual(self.names(first),
+                         ['Рецепт 3', 'Рецепт 2', 'Рецепт 1'])
+        second = self.get_feed(first.data['next'])
+        self.assertEqual(self.names(second), ['Рецепт 0', 'Старый рецепт'])
+        self.assertIsNone(second.data['next'])
+        previous = self.get_feed(second.data['previous'])
+        self.assertEqual(self.names(previous), self.names(first))
+
+    def test_feed_queries_do_not_grow_with_follows(self):
+        self.subscribe(self.cook)
+        self.subscribe(self.star)
+        create_recipe(self.star, 'Рецепт звезды')
+        self.get_feed()
+        with CaptureQueriesContext(connection) as queries:
+            self.get_feed()
+        self.assertEqual(len(queries), 5)
+        # Популярных авторов среди подписок нет - в ленту ничего не пишется.
+        self.assertFalse(any(query['sql'].lstrip().startswith('INSERT')
+                             for query in queries))
+        self.subscribe(self.stranger)
+        create_recipe(self.stranger, 'Ещё рецепт')
+        with self.assertNumQueries(5):
+            self.get_feed()
+
+    @mock.patch.object(feeds, 'FEED_FANOUT_LIMIT', 0)
+    def test_popular_author_is_pulled(self):
+        self.subscribe(self.star)
+        recipe = create_recipe(self.star, 'Рецепт звезды')
+        self.assertFalse(FeedEntry.objects.filter(recipe=recipe).exists())
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.names(self.get_feed()), ['Рецепт звезды'])
+        self.assertTrue(any(query['sql'].lstrip().startswith('INSERT')
+                            for query in queries))
+        self.assertEqual(self.names(self.get_feed()), ['Рецепт звезды'])
+
+    @mock.patch.object(feeds, 'FEED_FANOUT_LIMIT', 1)
+    def test_threshold_counts_follows_made_outside_api(self):
+        # Подписка из админки тоже меняет followers_count звезды.
+        Follow.objects.create(user=self.stranger, author=self.star)
+        self.subscribe(self.star)
+        recipe = create_recipe(self.star, 'Рецепт звезды')
+        self.assertFalse(FeedEntry.objects.filter(recipe=recipe).exists())
+        self.assertEqual(self.names(self.get_feed()), ['Рецепт звезды'])
+
+    def test_rebuild_feeds(self):
+        self.subscribe(self.cook)
+        FeedEntry.objects.all().delete()
+        call_command('rebuild_feeds', stdout=StringIO())
+        self.assertEqual(self.names(self.get_feed()), ['Старый рецепт'])
+
+    def test_anonymous(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(FEED_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.recipes import image_processing, images
+from apps.recipes.models import Ingredient, Recipe, Tag
+from apps.users.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(path, size=(1000, 500)):
+    Image.new('RGB', size, 'orange').save(path, 'PNG')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageDerivativesTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='author@test.ru', username='author',
+            first_name='Автор', last_name='Тестов', password='pass')
+        cls.tag = Tag.objects.create(name='Обед', color='#000000',
+                                     slug='lunch')
+        cls.ingredient = Ingredient.objects.create(name='соль',
+                                                   measurement_unit='г')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def create_recipe(self):
+        os.makedirs(os.path.join(MEDIA_ROOT, 'recipes'), exist_ok=True)
+        make_image(os.path.join(MEDIA_ROOT, 'recipes', 'photo.png'))
+        with self.captureOnCommitCallbacks(execute=True):
+            return Recipe.objects.create(
+                author=self.user, name='Рецепт', text='Текст',
+                cooking_time=5, image='recipes/photo.png')
+
+    @mock.patch.object(images, 'IMAGE_WORKERS', 0)
+    def test_derivatives_are_built_after_save(self):
+        recipe = self.create_recipe()
+        recipe.refresh_from_db()
+        self.assertEqual(set(recipe.thumbnails), {'300', '600'})
+        with default_storage.open(recipe.thumbnails['300']['webp']) as file:
+            self.assertEqual(Image.open(file).size, (300, 150))
+        with default_storage.open(recipe.thumbnails['600']['jpeg']) as file:
+            self.assertEqual(Image.open(file).format, 'JPEG')
+        response = self.client.get(f'/api/recipes/{recipe.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['thumbnails']['300']['webp'].endswith(
+            'recipes/derivatives/photo_png_300.webp'))
+
+    def test_derivative_names_depend_on_extension(self):
+        png = images.get_derivative_names('recipes/photo.png')
+        jpg = images.get_derivative_names('recipes/photo.jpg')
+        self.assertFalse(set(images.iter_names(png))
+                         & set(images.iter_names(jpg)))
+
+    @mock.patch.object(images, 'IMAGE_WORKERS', 0)
+    def test_shared_derivatives_are_kept(self):
+        first, second = self.create_recipe(), self.create_recipe()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        shared = list(images.iter_names(second.thumbnails))
+        make_image(os.path.join(MEDIA_ROOT, 'recipes', 'other.png'))
+        for recipe in (first, second):
+            recipe.image = 'recipes/other.png'
+            with self.captureOnCommitCallbacks(execute=True):
+                recipe.save()
+            # Копии photo.png удаляются, только когда их не держит никто.
+            self.assertEqual(
+                [default_storage.exists(name) for name in shared],
+                [recipe is first] * len(shared))
+
+    def test_anonymous_cache_sees_thumbnails(self):
+        # Воркеры включены: копии записывает images.save из callback.
+        self.assertTrue(images.IMAGE_WORKERS)
+        os.makedirs(os.path.join(MEDIA_ROOT, 'recipes'), exist_ok=True)
+        make_image(os.path.join(MEDIA_ROOT, 'recipes', 'cached.png'))
+        recipe = Recipe.objects.create(
+            author=self.user, name='Рецепт', text='Текст',
+            cooking_time=5, image='recipes/cached.png')
+        for cache_status in ('MISS', 'HIT'):
+            response = self.client.get('/api/recipes/')
+            self.assertEqual(response['X-Cache'], cache_status)
+            self.assertEqual(response.data['results'][0]['thumbnails'], {})
+        names = images.get_derivative_names(recipe.image.name)
+        images.save(recipe.pk, recipe.image.name, names, {})
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(set(response.data['results'][0]['thumbnails']),
+                         {'300', '600'})
+        response = self.client.get(f'/api/recipes/{recipe.pk}/')
+        self.assertEqual(set(response.data['thumbnails']), {'300', '600'})
+
+    def test_derivatives_are_built_in_process_pool(self):
+        source = os.path.join(MEDIA_ROOT, 'pool.png')
+        target = os.path.join(MEDIA_ROOT, 'pool', 'pool_300.webp')
+        make_image(source)
+        images.get_executor().submit(
+            image_processing.render_derivatives,
+            source, [(300, 'webp', target)], 80).result(timeout=60)
+        self.assertEqual(Image.open(target).size, (300, 150))
@@ -0,0 +1,89 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.recipes import search, versions
+from apps.recipes.models import Ingredient, Tag
+
+INGREDIENTS_URL = '/api/ingredients/'
+TAGS_URL = '/api/tags/'
+
+
+class IngredientSearchTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г') for name in (
+                'Сгущённое молоко', 'молоко', 'Молоко козье',
+                'ёжевика', 'творог', 'соль')
+        )
+
+    def setUp(self):
+        versions.bump_version(versions.INGREDIENTS)
+
+    def names(self, query):
+        response = self.client.get(INGREDIENTS_URL, {'name': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.data]
+
+    def test_prefix_matches_go_first(self):
+        self.assertEqual(
+            self.names('МОЛ'),
+            ['молоко', 'Молоко козье', 'Сгущённое молоко'])
+
+    def test_yo_and_case_folding(self):
+        self.assertEqual(self.names('Ежев'), ['ёжевика'])
+        self.assertEqual(self.names('сгущенное'), ['Сгущённое молоко'])
+
+    def test_result_cap(self):
+        index = search.get_index()
+        self.assertEqual(len(index.search('мол', limit=2)), 2)
+
+    def test_index_is_rebuilt_on_change(self):
+        self.assertEqual(self.names('тво'), ['творог'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name='творожная масса',
+                                      measurement_unit='г')
+        self.assertEqual(self.names('тво'), ['творог', 'творожная масса'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.filter(name='творог').get().delete()
+        self.assertEqual(self.names('тво'), ['творожная масса'])
+
+    def test_search_does_not_hit_database(self):
+        search.get_index()
+        with self.assertNumQueries(0):
+            self.names('соль')
+
+    def test_list_without_query(self):
+        response = self.client.get(INGREDIENTS_URL)
+        self.assertEqual(len(response.data), 6)
+
+
+class ReferenceCacheTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Tag.objects.create(name='Завтрак', color='#E26C2D', slug='breakfast')
+
+    def setUp(self):
+        versions.bump_version(versions.TAGS)
+
+    def test_tags_are_served_from_memory(self):
+        first = self.client.get(TAGS_URL)
+        with self.assertNumQueries(0):
+            second = self.client.get(TAGS_URL)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertIn('max-age', second['Cache-Control'])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get(TAGS_URL)['ETag']
+        response = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_change_bumps_version(self):
+        etag = self.client.get(TAGS_URL)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Обед', color='#49B64E', slug='lunch')
+        response = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data), 2)
@@ -0,0 +1,86 @@
+import io
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from apps.recipes.management.commands import load_ingredients
+from apps.recipes.models import Ingredient
+
+ROWS = [('мука', 'г'), ('молоко', 'мл'), ('соль', 'г'), ('яйцо', 'шт'),
+        ('сахар', 'г')]
+
+
+class LoadIngredientsTestCase(TestCase):
+    """Загрузка справочника из CSV, JSON и JSON Lines."""
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, name, text):
+        path = self.directory / name
+        path.write_text(text, encoding='utf-8')
+        return path
+
+    def load(self, path, *args):
+        out = io.StringIO()
+        call_command('load_ingredients', str(path), *args, stdout=out,
+                     stderr=io.StringIO())
+        return out.getvalue().strip()
+
+    def assertLoaded(self, path):
+        # Пять строк пачками по две, повтор внутри файла пропускается.
+        self.assertEqual(self.load(path, '--batch-size=2'),
+                         'Created total: 5, skipped: 1')
+        self.assertEqual(
+            set(Ingredient.objects.values_list('name', 'measurement_unit')),
+            set(ROWS))
+        self.assertEqual(self.load(path, '--batch-size=2'),
+                         'Created total: 0, skipped: 6')
+
+    def test_csv(self):
+        self.assertLoaded(self.write('data.csv', ''.join(
+            f'{name},{unit}\n' for name, unit in [*ROWS, ROWS[0]])))
+
+    def test_jsonl(self):
+        self.assertLoaded(self.write('data.jsonl', '\n\n'.join(
+            json.dumps({'name': name, 'measurement_unit': unit})
+            for name, unit in [*ROWS, ROWS[0]])))
+
+    def test_json_array(self):
+        self.assertLoaded(self.write('data.json', json.dumps(
+            [{'name': name, 'measurement_unit': unit}
+             for name, unit in [*ROWS, ROWS[0]]], indent=2)))
+
+    def test_empty_unit_is_kept(self):
+        self.load(self.write('data.csv', 'щепотка,\n'))
+        self.assertEqual(Ingredient.objects.get().measurement_unit, '')
+
+    def test_bad_records(self):
+        for name, text in (
+                ('broken.json', '[{"name": "мука", '),
+                ('broken.jsonl', '{"name": "мука"\n'),
+                ('missing.jsonl', '{"name": "мука"}\n'),
+                ('scalar.json', '[1]')):
+            with self.subTest(name=name):
+                with self.assertRaisesRegex(CommandError, name):
+                    self.load(self.write(name, text))
+        self.assertFalse(Ingredient.objects.exists())
+
+    def test_json_array_is_read_in_chunks(self):
+        items = [{'name': name, 'measurement_unit': unit}
+                 for name, unit in ROWS]
+        file = io.StringIO(json.dumps(items)[1:])
+        self.assertEqual(
+            list(load_ingredients.read_json_array(file, chunk_size=7)),
+            items)
+        with self.assertRaises(json.JSONDecodeError):
+            list(load_ingredients.read_json_array(
+                io.StringIO('{"name": "мука"}, {"na'), chunk_size=7))
@@ -0,0 +1,98 @@
+import re
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from api import metrics
+from apps.recipes.models import (Ingredient, Recipe, RecipeIngredient,
+                                 ShoppingCart)
+from apps.users.models import User
+
+
+class MetricsTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='reader@test.ru', username='reader',
+            first_name='Читатель', last_name='Тестов', password='pass')
+        ingredient = Ingredient.objects.create(name='мука',
+                                               measurement_unit='г')
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                author=cls.user, name=f'Блины {i}', text='Текст',
+                cooking_time=10)
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=100)
+        ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        cache.clear()
+        metrics.histograms.series.clear()
+
+    def get_timing(self, response):
+        return dict(
+            (name, params) for name, params in (
+                part.split(';', 1) for part
+                in response['Server-Timing'].split(', ')))
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/recipes/')
+        timing = self.get_timing(response)
+        self.assertEqual(set(timing), {'db', 'serializer', 'total'})
+        self.assertIn(f'desc="{len(queries)} queries"', timing['db'])
+        self.assertRegex(timing['total'], r'^dur=\d+\.\d$')
+
+    def test_pdf_time_is_reported(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('pdf', self.get_timing(response))
+
+    def test_metrics_endpoint(self):
+        for _ in range(2):
+            self.client.get('/api/recipes/')
+        self.client.get('/api/tags/')
+        with mock.patch.object(metrics, 'METRICS_TOKEN', 'secret'):
+            response = self.client.get(
+                '/api/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        label = 'view="api:recipes-list",method="GET"'
+        self.assertIn(
+            f'foodgram_request_duration_seconds_count{{{label}}} 2', body)
+        self.assertIn(
+            f'foodgram_request_duration_seconds_bucket'
+            f'{{{label},le="+Inf"}} 2', body)
+        self.assertRegex(
+            body, re.escape(f'foodgram_request_queries_total{{{label}}} ')
+            + r'[1-9]')
+        self.assertIn(f'{{{label},span="serializer"}}', body)
+        self.assertIn('view="api:tags-list"', body)
+        self.assertIn('foodgram_anonymous_cache_total{result="hit"}', body)
+
+    def test_metrics_token(self):
+        with mock.patch.object(metrics, 'METRICS_TOKEN', 'secret'):
+            self.assertEqual(
+                self.client.get('/api/metrics/').status_code, 403)
+            response = self.client.get(
+                '/api/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_without_token_need_staff(self):
+        with mock.patch.object(metrics, 'METRICS_TOKEN', ''):
+            self.assertEqual(
+                self.client.get('/api/metrics/').status_code, 403)
+            response = self.client.get(
+                '/api/metrics/', HTTP_AUTHORIZATION='Bearer ')
+            self.assertEqual(response.status_code, 403)
+            self.client.force_login(self.user)
+            self.assertEqual(
+                self.client.get('/api/metrics/').status_code, 403)
+            User.objects.filter(pk=self.user.pk).update(is_staff=True)
+            self.assertEqual(
+                self.client.get('/api/metrics/').status_code, 200)
@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.recipes.models import Recipe, Tag
+from apps.users.models import Follow, User
+
+RECIPES_URL = '/api/recipes/'
+
+
+class CursorPaginationTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='author@test.ru', username='author',
+            first_name='Автор', last_name='Тестов', password='pass')
+        cls.tag = Tag.objects.create(name='Обед', color='#000000',
+                                     slug='lunch')
+        Recipe.objects.bulk_create(
+            Recipe(author=cls.user, name=f'Рецепт {i}', text='Текст',
+                   cooking_time=10)
+            for i in range(7))
+        now = timezone.now()
+        for i, recipe in enumerate(Recipe.objects.order_by('id')):
+            # у пары рецептов одинаковая дата, порядок решает id
+            recipe.pub_date = now - timedelta(minutes=min(i, 5))
+            recipe.save(update_fields=['pub_date'])
+            if i % 2:
+                recipe.tags.add(cls.tag)
+
+    def walk(self, url, params, key='next'):
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            pages.append([item['id'] for item in response.data['results']])
+            if not response.data[key]:
+                return pages, response
+            response = self.client.get(response.data[key])
+
+    def test_pages_follow_feed_order(self):
+        expected = list(Recipe.objects.order_by(
+            '-pub_date', '-id').values_list('id', flat=True))
+        pages, last = self.walk(RECIPES_URL, {'cursor': '', 'limit': 3})
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), expected)
+        back, _ = self.walk(last.data['previous'], {}, key='previous')
+        self.assertEqual(back, [pages[1], pages[0]])
+
+    def test_filters_are_applied(self):
+        pages, _ = self.walk(
+            RECIPES_URL, {'cursor': '', 'limit': 2, 'tags': 'lunch'})
+        expected = list(Recipe.objects.filter(tags=self.tag).order_by(
+            '-pub_date', '-id').values_list('id', flat=True))
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(RECIPES_URL, {'cursor': 'broken'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_mode_is_default(self):
+        response = self.client.get(RECIPES_URL, {'limit': 3, 'page': 2})
+        self.assertEqual(response.data['count'], 7)
+
+    def test_subscriptions(self):
+        for i in range(5):
+            author = User.objects.create_user(
+                email=f'a{i}@test.ru', username=f'a{i}',
+                first_name='Автор', last_name='Тестов', password='pass')
+            Follow.objects.create(user=self.user, author=author)
+        self.client.force_authenticate(self.user)
+        pages, _ = self.walk('/api/users/subscriptions/',
+                             {'cursor': '', 'limit': 2})
+        self.assertEqual(sum(pages, []), list(User.objects.filter(
+            following__user=self.user).values_list('id', flat=True)))
@@ -0,0 +1,149 @@
+import random
+import re
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import RequestFactory, TestCase
+
+from api.filters import RecipeFilter
+from apps.recipes.models import (Favorite, Ingredient, Recipe,
+                                 RecipeIngredient, ShoppingCart,
+                                 ShoppingListItem, Tag)
+from apps.users.models import Follow, User
+
+USERS = 50
+RECIPES = 2000
+INGREDIENTS = 500
+TAGS = 5
+INGREDIENTS_PER_RECIPE = 6
+
+# Полный проход по таблице: "Seq Scan on t" в PostgreSQL,
+# "SCAN t" без "USING ... INDEX" в SQLite. Обход виртуальной таблицы FTS5
+# с условием (например, "VIRTUAL TABLE INDEX 0:M1") полным не считается.
+FULL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(
+        r'\bSCAN (\w+)'
+        r'(?!.*(?:USING (?:COVERING |)INDEX|VIRTUAL TABLE INDEX \d+:\S))$',
+        re.MULTILINE),
+}
+
+
+class QueryPlanTestCase(TestCase):
+    """Горячие запросы API не должны полностью сканировать таблицы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(0)
+        users = User.objects.bulk_create(
+            User(email=f'user{i}@test.ru', username=f'user{i}',
+                 first_name='Имя', last_name='Фамилия', password='pass')
+            for i in range(USERS))
+        tags = Tag.objects.bulk_create(
+            Tag(name=f'Тег {i}', color='#000000', slug=f'tag{i}')
+            for i in range(TAGS))
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {i}', measurement_unit='г')
+            for i in range(INGREDIENTS))
+        recipes = Recipe.objects.bulk_create(
+            Recipe(author=rng.choice(users), name=f'Рецепт {i}',
+                   text='Текст', cooking_time=10)
+            for i in range(RECIPES))
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag=tag)
+            for recipe in recipes
+            for tag in rng.sample(tags, 2))
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for recipe in recipes
+            for ingredient in rng.sample(ingredients,
+                                         INGREDIENTS_PER_RECIPE))
+        cls.user = users[0]
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create(
+                model(user=user, recipe=recipe)
+                for user in users
+                for recipe in rng.sample(recipes, 20))
+        Follow.objects.bulk_create(
+            Follow(user=user, author=author)
+            for user in users
+            for author in rng.sample(users, 5) if author != user)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # На тестовом объёме планировщик предпочтёт Seq Scan даже при
+            # наличии индекса; проверяем, что индексный путь существует.
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+    def get_request(self, user, **params):
+        request = RequestFactory().get('/api/recipes/', params)
+        request.user = user
+        return request
+
+    def assertNoFullScan(self, queryset):
+        self.assertEqual(self.full_scans(queryset), [])
+
+    def full_scans(self, queryset):
+        pattern = FULL_SCAN.get(connection.vendor)
+        if pattern is None:
+            self.skipTest(f'Нет разбора планов для {connection.vendor}')
+        return pattern.findall(queryset.explain())
+
+    def test_full_scan_is_detected(self):
+        self.assertEqual(
+            self.full_scans(Recipe.objects.filter(cooking_time=5).order_by()),
+            ['recipes_recipe'])
+
+    def filtered_recipes(self, user=None, **params):
+        user = user or self.user
+        return RecipeFilter(
+            params, queryset=Recipe.objects.for_read(user),
+            request=self.get_request(user, **params)
+        ).qs.order_by('-pub_date', '-id')[:6]
+
+    def test_feed(self):
+        self.assertNoFullScan(self.filtered_recipes())
+
+    def test_feed_anonymous(self):
+        self.assertNoFullScan(self.filtered_recipes(AnonymousUser()))
+
+    def test_filter_by_author(self):
+        self.assertNoFullScan(self.filtered_recipes(author=self.user.id))
+
+    def test_filter_by_tags(self):
+        self.assertNoFullScan(self.filtered_recipes(tags=['tag1', 'tag2']))
+
+    def test_filter_favorited(self):
+        self.assertNoFullScan(self.filtered_recipes(is_favorited=1))
+
+    def test_filter_in_shopping_cart(self):
+        self.assertNoFullScan(self.filtered_recipes(is_in_shopping_cart=1))
+
+    def test_search(self):
+        self.assertNoFullScan(RecipeFilter(
+            {'search': 'рецепт 15'}, queryset=Recipe.objects.for_read(
+                self.user), request=self.get_request(self.user)).qs[:6])
+
+    def test_recipe_ingredients_prefetch(self):
+        ids = list(Recipe.objects.values_list('id', flat=True)[:6])
+        self.assertNoFullScan(RecipeIngredient.objects.filter(
+            recipe__in=ids).select_related('ingredient'))
+
+    def test_recipe_tags_prefetch(self):
+        ids = list(Recipe.objects.values_list('id', flat=True)[:6])
+        self.assertNoFullScan(Tag.objects.filter(recipes__in=ids))
+
+    def test_shopping_list_download(self):
+        self.assertNoFullScan(
+            ShoppingListItem.objects.for_download(self.user))
+
+    def test_followed_authors(self):
+        self.assertNoFullScan(Follow.objects.filter(
+            user=self.user).values_list('author_id', flat=True))
+
+    def test_subscriptions(self):
+        self.assertNoFullScan(
+            User.objects.filter(following__user=self.user).order_by('id'))
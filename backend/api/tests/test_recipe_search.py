@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from apps.recipes.models import Recipe, Tag
+from apps.users.models import User
+
+RECIPES_URL = '/api/recipes/'
+
+
+class RecipeSearchTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@test.ru', username='author',
+            first_name='Автор', last_name='Тестов', password='pass')
+        cls.tag = Tag.objects.create(
+            name='Обед', color='#49B64E', slug='lunch')
+        cls.borsch = cls.create_recipe('Борщ', 'Свёкла, капуста, мясо.')
+        cls.salad = cls.create_recipe('Винегрет', 'Свекла и огурцы.')
+        cls.soup = cls.create_recipe('Суп', 'Как борщ, но без свёклы.')
+        cls.borsch.tags.add(cls.tag)
+
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def create_recipe(cls, name, text):
+        return Recipe.objects.create(
+            author=cls.author, name=name, text=text, cooking_time=10)
+
+    def search(self, query, **params):
+        response = self.client.get(RECIPES_URL, {'search': query, **params})
+        return [recipe['name'] for recipe in response.data['results']]
+
+    def test_name_match_ranks_above_text_match(self):
+        self.assertEqual(self.search('борщ'), ['Борщ', 'Суп'])
+
+    def test_cursor_keeps_relevance_order(self):
+        response = self.client.get(RECIPES_URL,
+                                   {'search': 'борщ', 'cursor': ''})
+        self.assertEqual(
+            [recipe['name'] for recipe in response.data['results']],
+            ['Борщ', 'Суп'])
+        self.assertEqual(response.data['count'], 2)
+
+    def test_search_ignores_case_and_yo(self):
+        self.assertCountEqual(self.search('СВЕКЛ'),
+                              ['Борщ', 'Винегрет', 'Суп'])
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.search('свекла огурцы'), ['Винегрет'])
+        self.assertEqual(self.search('борщ огурцы'), [])
+
+    def test_search_combines_with_filters(self):
+        self.assertEqual(self.search('борщ', tags='lunch'), ['Борщ'])
+
+    def test_index_follows_changes(self):
+        self.salad.name = 'Салат'
+        self.salad.save()
+        self.soup.delete()
+        self.assertEqual(self.search('винегрет'), [])
+        self.assertEqual(self.search('салат'), ['Салат'])
+        self.assertEqual(self.search('борщ'), ['Борщ'])
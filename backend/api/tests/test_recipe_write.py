@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from apps.users.models import User
+
+RECIPES_URL = '/api/recipes/'
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAgMAAABieywaAAAA'
+    'CVBMVEUAAAD///9fX1/S0ecCAAAACXBIWXMAAA7EAAAOxAGVKw4bAAAACklEQVQImWNo'
+    'AAAAggCByxOyYQAAAABJRU5ErkJggg=='
+)
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RecipeWriteTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='author@test.ru', username='author',
+            first_name='Автор', last_name='Тестов', password='pass')
+        cls.tags = Tag.objects.bulk_create(
+            Tag(name=f'Тег {i}', color='#000000', slug=f'tag{i}')
+            for i in range(2))
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {i}', measurement_unit='г')
+            for i in range(10))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def payload(self, ingredients, **kwargs):
+        return {
+            'name': 'Рецепт',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': IMAGE,
+            'tags': [tag.id for tag in self.tags],
+            'ingredients': [{'id': ingredient.id, 'amount': amount}
+                            for ingredient, amount in ingredients],
+            **kwargs
+        }
+
+    def create_recipe(self, size):
+        response = self.client.post(
+            RECIPES_URL,
+            self.payload([(item, 1) for item in self.ingredients[:size]]),
+            format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Recipe.objects.get(pk=response.data['id'])
+
+    def test_create_queries_do_not_grow_with_ingredients(self):
+        payload = self.payload([(item, 1) for item in self.ingredients])
+        # 13-й запрос - раскладка рецепта по лентам подписчиков.
+        with self.assertNumQueries(13):
+            response = self.client.post(RECIPES_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['ingredients']), 10)
+
+    def test_unknown_ingredient_is_validation_error(self):
+        payload = self.payload([(self.ingredients[0], 1)])
+        payload['ingredients'].append({'id': 100500, 'amount': 1})
+        response = self.client.post(RECIPES_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('100500', str(response.data))
+
+    def test_partial_update_of_name(self):
+        recipe = self.create_recipe(5)
+        image = recipe.image.name
+        with self.assertNumQueries(7):
+            response = self.client.patch(
+                f'{RECIPES_URL}{recipe.id}/', {'name': 'Новое название'},
+                format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.name, 'Новое название')
+        self.assertEqual(recipe.image.name, image)
+        self.assertEqual(recipe.recipes.count(), 5)
+
+    def test_update_applies_ingredient_diff(self):
+        recipe = self.create_recipe(3)
+        kept = RecipeIngredient.objects.get(
+            recipe=recipe, ingredient=self.ingredients[0])
+        payload = self.payload(
+            [(self.ingredients[0], 1), (self.ingredients[1], 5),
+             (self.ingredients[5], 2)])
+        del payload['image']
+        response = self.client.patch(
+            f'{RECIPES_URL}{recipe.id}/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        amounts = dict(recipe.recipes.values_list('ingredient_id', 'amount'))
+        self.assertEqual(amounts, {self.ingredients[0].id: 1,
+                                   self.ingredients[1].id: 5,
+                                   self.ingredients[5].id: 2})
+        self.assertTrue(RecipeIngredient.objects.filter(pk=kept.pk).exists())
@@ -0,0 +1,127 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.recipes.models import (Favorite, Ingredient, Recipe,
+                                 RecipeIngredient, ShoppingCart, Tag)
+from apps.users.models import Follow, User
+
+RECIPES_URL = '/api/recipes/'
+
+
+class RecipeReadQueriesTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='reader@test.ru', username='reader',
+            first_name='Читатель', last_name='Тестов', password='pass')
+        cls.tags = Tag.objects.bulk_create(
+            Tag(name=f'Тег {i}', color='#000000', slug=f'tag{i}')
+            for i in range(3))
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {i}', measurement_unit='г')
+            for i in range(5))
+
+    def create_recipes(self, count):
+        for i in range(count):
+            author = User.objects.create_user(
+                email=f'author{Recipe.objects.count()}@test.ru',
+                username=f'author{Recipe.objects.count()}',
+                first_name='Автор', last_name='Тестов', password='pass')
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {i}', text='Текст',
+                cooking_time=10)
+            recipe.tags.set(self.tags)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=1)
+                for ingredient in self.ingredients)
+            Favorite.objects.create(user=self.user, recipe=recipe)
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+            Follow.objects.create(user=self.user, author=author)
+
+    def count_list_queries(self, limit):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(RECIPES_URL, {'limit': limit})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context), response
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        self.client.force_authenticate(self.user)
+        self.create_recipes(12)
+        small, _ = self.count_list_queries(2)
+        large, response = self.count_list_queries(12)
+        self.assertEqual(small, large)
+        recipe = response.data['results'][0]
+        self.assertTrue(recipe['is_favorited'])
+        self.assertTrue(recipe['is_in_shopping_cart'])
+        self.assertTrue(recipe['author']['is_subscribed'])
+        self.assertEqual(len(recipe['ingredients']), 5)
+        self.assertEqual(len(recipe['tags']), 3)
+
+    def test_anonymous_flags_are_false(self):
+        self.create_recipes(2)
+        response = self.client.get(RECIPES_URL)
+        recipe = response.data['results'][0]
+        self.assertFalse(recipe['is_favorited'])
+        self.assertFalse(recipe['is_in_shopping_cart'])
+        self.assertFalse(recipe['author']['is_subscribed'])
+
+    def test_detail_queries(self):
+        self.client.force_authenticate(self.user)
+        self.create_recipes(1)
+        recipe = Recipe.objects.get()
+        with self.assertNumQueries(3):
+            response = self.client.get(f'{RECIPES_URL}{recipe.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_favorited'])
+
+    def test_compact_view(self):
+        self.client.force_authenticate(self.user)
+        self.create_recipes(3)
+        full, _ = self.count_list_queries(3)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(RECIPES_URL, {'view': 'compact'})
+        self.assertEqual(set(response.data['results'][0]), {
+            'id', 'tags', 'author', 'name', 'image', 'thumbnails',
+            'cooking_time'})
+        self.assertTrue(response.data['results'][0]['author']['is_subscribed'])
+        self.assertEqual(len(context), full - 1)
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertNotIn('recipes_recipeingredient', sql)
+        self.assertNotIn('"recipes_recipe"."text"', sql)
+        self.assertNotIn('recipes_favorite', sql)
+
+    def test_fields_and_omit(self):
+        self.client.force_authenticate(self.user)
+        self.create_recipes(2)
+        recipe = Recipe.objects.first()
+        # Без связей: только сам рецепт.
+        with self.assertNumQueries(1):
+            response = self.client.get(f'{RECIPES_URL}{recipe.id}/',
+                                       {'fields': 'id,name,is_favorited'})
+        self.assertEqual(response.data, {
+            'id': recipe.id, 'name': recipe.name, 'is_favorited': True})
+        response = self.client.get(
+            RECIPES_URL, {'view': 'compact', 'omit': 'author,thumbnails'})
+        self.assertEqual(set(response.data['results'][0]), {
+            'id', 'tags', 'name', 'image', 'cooking_time'})
+        response = self.client.get(RECIPES_URL, {'omit': 'text'})
+        self.assertNotIn('text', response.data['results'][0])
+        self.assertIn('ingredients', response.data['results'][0])
+
+    def test_unknown_fields(self):
+        for params in ({'fields': 'id,secret'}, {'omit': 'password'},
+                       {'view': 'tiny'}):
+            response = self.client.get(RECIPES_URL, params)
+            self.assertEqual(response.status_code,
+                             status.HTTP_400_BAD_REQUEST)
+
+    def test_download_shopping_cart(self):
+        self.client.force_authenticate(self.user)
+        self.create_recipes(2)
+        response = self.client.get(f'{RECIPES_URL}download_shopping_cart/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(b''.join(response.streaming_content).startswith(
+            b'%PDF'))
@@ -0,0 +1,123 @@
+import csv
+import io
+import re
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api import shopping_list
+from apps.recipes.models import (Ingredient, Recipe, RecipeIngredient,
+                                 ShoppingCart)
+from apps.users.models import User
+
+TITLE = ['Список покупок для: Тест', 'Дата: сегодня']
+
+
+def make_body(size):
+    return [f' - Ингредиент {i} (г) - {i}' for i in range(size)]
+
+
+class ShoppingListPdfTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def count_pages(self, pdf):
+        return len(re.findall(rb'/Type /Page\b', pdf))
+
+    def test_long_list_breaks_into_pages(self):
+        buffer = io.BytesIO()
+        shopping_list.render(TITLE, make_body(500), buffer)
+        self.assertGreater(self.count_pages(buffer.getvalue()), 1)
+
+    def test_short_list_fits_one_page(self):
+        buffer = io.BytesIO()
+        shopping_list.render(TITLE, make_body(10), buffer)
+        self.assertEqual(self.count_pages(buffer.getvalue()), 1)
+
+    def test_unchanged_cart_is_served_from_cache(self):
+        body = make_body(10)
+        first = shopping_list.get_pdf(TITLE, body).getvalue()
+        with mock.patch.object(shopping_list, 'render') as render:
+            second = shopping_list.get_pdf(TITLE, body).getvalue()
+            shopping_list.get_pdf(TITLE, make_body(11))
+        self.assertEqual(first, second)
+        render.assert_called_once()
+
+    def test_amount_format(self):
+        line = shopping_list.get_line({
+            'ingredient__name': 'мука',
+            'ingredient__measurement_unit': 'г',
+            'amount': '150.50'})
+        self.assertEqual(line, ' - мука (г) - 150.5')
+
+
+class DownloadShoppingCartTestCase(APITestCase):
+    URL = '/api/recipes/download_shopping_cart/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='buyer@test.ru', username='buyer',
+            first_name='Покупатель', last_name='Тестов', password='pass')
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in ('мука', 'сахар, песок'))
+        for amount in ('100.50', '50'):
+            recipe = Recipe.objects.create(
+                author=cls.user, name='Пирог', text='Текст',
+                cooking_time=10)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=amount)
+                for ingredient in ingredients)
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def download(self, file_format=None):
+        params = {'format': file_format} if file_format else {}
+        return self.client.get(self.URL, params)
+
+    def test_txt_is_streamed(self):
+        response = self.download('txt')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'],
+                         'text/plain; charset=utf-8')
+        self.assertIn('shopping.txt', response['Content-Disposition'])
+        text = b''.join(response.streaming_content).decode()
+        self.assertTrue(text.startswith(
+            'Список покупок для: Покупатель Тестов\n'))
+        self.assertIn(' - мука (г) - 150.5\n', text)
+        self.assertIn(' - сахар, песок (г) - 150.5\n', text)
+
+    def test_csv_is_streamed(self):
+        response = self.download('csv')
+        self.assertTrue(response.streaming)
+        self.assertIn('shopping.csv', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], list(shopping_list.CSV_HEADER))
+        self.assertCountEqual(rows[1:], [['мука', 'г', '150.5'],
+                                         ['сахар, песок', 'г', '150.5']])
+
+    def test_pdf_is_default(self):
+        response = self.download()
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('shopping.pdf', response['Content-Disposition'])
+        self.assertEqual(self.download('pdf')['Content-Type'],
+                         'application/pdf')
+
+    def test_unknown_format(self):
+        response = self.download('docx')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_empty_cart(self):
+        ShoppingCart.objects.all().delete()
+        response = self.download('txt')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,110 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.tests.utils import create_user
+from apps.recipes.models import (Ingredient, Recipe, RecipeIngredient,
+                                 ShoppingCart, ShoppingListItem)
+
+RECIPES_URL = '/api/recipes/'
+
+
+class ShoppingListItemsTestCase(APITestCase):
+    """Списки покупок пересчитываются по мере изменения корзин."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('buyer')
+        cls.other = create_user('other')
+        cls.author = create_user('author')
+        cls.flour, cls.milk, cls.salt = Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in ('мука', 'молоко', 'соль'))
+        cls.pancakes = cls.create_recipe(
+            'Блины', {cls.flour: '200', cls.milk: '500.50'})
+        cls.bread = cls.create_recipe('Хлеб', {cls.flour: '300.25',
+                                               cls.salt: '5'})
+
+    @classmethod
+    def create_recipe(cls, name, amounts):
+        recipe = Recipe.objects.create(
+            author=cls.author, name=name, text='Текст', cooking_time=10)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                             amount=amount)
+            for ingredient, amount in amounts.items())
+        return recipe
+
+    def cart(self, user, recipe, method='post'):
+        self.client.force_authenticate(user)
+        response = getattr(self.client, method)(
+            f'{RECIPES_URL}{recipe.pk}/shopping_cart/')
+        self.assertIn(response.status_code, (
+            status.HTTP_201_CREATED, status.HTTP_204_NO_CONTENT))
+
+    def assertItems(self, user, expected):
+        self.assertEqual(dict(ShoppingListItem.objects.filter(
+            user=user).values_list('ingredient__name', 'amount')), {
+            name: Decimal(amount) for name, amount in expected.items()})
+
+    def test_cart_changes_are_applied(self):
+        self.cart(self.user, self.pancakes)
+        self.assertItems(self.user, {'мука': '200', 'молоко': '500.50'})
+        self.cart(self.user, self.bread)
+        self.assertItems(self.user, {'мука': '500.25', 'молоко': '500.50',
+                                     'соль': '5'})
+        self.cart(self.user, self.pancakes, 'delete')
+        self.assertItems(self.user, {'мука': '300.25', 'соль': '5'})
+        self.cart(self.user, self.bread, 'delete')
+        self.assertItems(self.user, {})
+
+    def test_recipe_edit_is_applied_to_every_cart(self):
+        self.cart(self.user, self.pancakes)
+        self.cart(self.user, self.bread)
+        self.cart(self.other, self.pancakes)
+        self.client.force_authenticate(self.author)
+        response = self.client.patch(
+            f'{RECIPES_URL}{self.pancakes.pk}/', {'ingredients': [
+                {'id': self.flour.pk, 'amount': 100},
+                {'id': self.salt.pk, 'amount': 2}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertItems(self.user, {'мука': '400.25', 'соль': '7'})
+        self.assertItems(self.other, {'мука': '100', 'соль': '2'})
+
+    def test_deleted_recipe_leaves_carts(self):
+        self.cart(self.user, self.pancakes)
+        self.cart(self.user, self.bread)
+        self.client.force_authenticate(self.author)
+        self.client.delete(f'{RECIPES_URL}{self.bread.pk}/')
+        self.assertItems(self.user, {'мука': '200', 'молоко': '500.50'})
+
+    def test_download_reads_materialized_list(self):
+        self.cart(self.user, self.pancakes)
+        self.cart(self.user, self.bread)
+        response = self.client.get(
+            f'{RECIPES_URL}download_shopping_cart/?format=txt')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn(' - мука (г) - 500.25', body)
+        self.assertIn(' - соль (г) - 5', body)
+
+    def test_check_shopping_lists(self):
+        self.cart(self.user, self.pancakes)
+        ShoppingCart.objects.create(user=self.other, recipe=self.bread)
+        call_command('check_shopping_lists', stdout=StringIO())
+        ShoppingListItem.objects.filter(
+            user=self.user, ingredient=self.flour).update(amount=1)
+        ShoppingListItem.objects.filter(user=self.other).delete()
+        ShoppingListItem.objects.create(
+            user=self.user, ingredient=self.salt, amount=3)
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('check_shopping_lists', stdout=out)
+        self.assertIn('missing 2, extra 1, wrong 1', out.getvalue())
+        call_command('check_shopping_lists', '--fix', stdout=StringIO())
+        call_command('check_shopping_lists', stdout=StringIO())
+        self.assertItems(self.user, {'мука': '200', 'молоко': '500.50'})
+        self.assertItems(self.other, {'мука': '300.25', 'соль': '5'})
@@ -0,0 +1,94 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.tests.utils import create_user
+from apps.recipes.models import Recipe
+from apps.users.models import Follow, User
+
+SUBSCRIPTIONS_URL = '/api/users/subscriptions/'
+
+
+class SubscriptionsTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def add_authors(self, count, recipes=5):
+        for _ in range(count):
+            author = create_user(f'author{User.objects.count()}')
+            for i in range(recipes):
+                Recipe.objects.create(author=author, name=f'Рецепт {i}',
+                                      text='Текст', cooking_time=10)
+            Follow.objects.create(user=self.user, author=author)
+
+    def get_subscriptions(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(SUBSCRIPTIONS_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context), response.data['results']
+
+    def test_queries_do_not_grow_with_authors(self):
+        self.add_authors(2)
+        small, _ = self.get_subscriptions(limit=10, recipes_limit=3)
+        self.add_authors(6)
+        large, results = self.get_subscriptions(limit=10, recipes_limit=3)
+        self.assertEqual(small, large)
+        self.assertEqual(len(results), 8)
+
+    def test_recipes_limit(self):
+        self.add_authors(2, recipes=5)
+        _, results = self.get_subscriptions(recipes_limit=2)
+        for author in results:
+            self.assertEqual(len(author['recipes']), 2)
+            self.assertEqual(author['recipes_count'], 5)
+            self.assertTrue(author['is_subscribed'])
+        _, results = self.get_subscriptions()
+        self.assertEqual(len(results[0]['recipes']), 5)
+
+    def test_subscribe_response(self):
+        author = create_user('author')
+        for i in range(4):
+            Recipe.objects.create(author=author, name=f'Рецепт {i}',
+                                  text='Текст', cooking_time=10)
+        response = self.client.post(
+            f'/api/users/{author.id}/subscribe/?recipes_limit=1')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data['is_subscribed'])
+        self.assertEqual(len(response.data['recipes']), 1)
+        self.assertEqual(response.data['recipes_count'], 4)
+
+
+class UsersListTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        for i in range(5):
+            author = create_user(f'author{i}')
+            if i % 2:
+                Follow.objects.create(user=cls.user, author=author)
+
+    def count_follow_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/users/', {'limit': 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        queries = [query['sql'] for query in context.captured_queries
+                   if 'users_follow' in query['sql']]
+        return len(queries), response.data['results']
+
+    def test_one_follow_query_per_response(self):
+        self.client.force_authenticate(self.user)
+        count, results = self.count_follow_queries()
+        self.assertEqual(count, 1)
+        subscribed = {user['username'] for user in results
+                      if user['is_subscribed']}
+        self.assertEqual(subscribed, {'author1', 'author3'})
+
+    def test_anonymous_has_no_follow_queries(self):
+        count, results = self.count_follow_queries()
+        self.assertEqual(count, 0)
+        self.assertFalse(any(user['is_subscribed'] for user in results))
@@ -0,0 +1,7 @@
+from apps.users.models import User
+
+
+def create_user(name):
+    return User.objects.create_user(
+        email=f'{name}@test.ru', username=name,
+        first_name='Имя', last_name='Фамилия', password='pass')
@@ -3,9 +3,11 @@ from djoser import serializers
 from rest_framework.fields import CharField, SerializerMethodField
 
 from apps.users.models import Follow, User
+from .metrics import TimedSerializerMixin
 
 
-class CustomUsersSerialiser(serializers.UserSerializer):
+class CustomUsersSerialiser(TimedSerializerMixin,
+                            serializers.UserSerializer):
     is_subscribed = SerializerMethodField()
 
     class Meta:
@@ -23,10 +25,24 @@ class CustomUsersSerialiser(serializers.UserSerializer):
     def user(self):
         return self.context['request'].user
 
+    @property
+    def followed_ids(self):
+        """Авторы, на которых подписан пользователь, - один запрос на ответ.
+
+        Контекст общий для корневого и вложенных сериализаторов, поэтому
+        множество загружается один раз за запрос.
+        """
+        if 'followed_ids' not in self.context:
+            self.context['followed_ids'] = set(
+                Follow.objects.filter(user=self.user).values_list(
+                    'author_id', flat=True))
+        return self.context['followed_ids']
+
     def get_is_subscribed(self, author):
+        if hasattr(author, 'is_subscribed'):
+            return author.is_subscribed
         if (self.context.get('request') and not self.user.is_anonymous):
-            return Follow.objects.filter(user=self.user,
-                                         author=author).exists()
+            return author.id in self.followed_ids
         return False
 
 
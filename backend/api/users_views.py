@@ -1,3 +1,6 @@
+from django.db import transaction
+from django.db.models import F, Prefetch, Value, Window
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404
 
 from djoser.views import UserViewSet
@@ -5,6 +8,7 @@ from rest_framework import exceptions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from apps.recipes.models import Recipe
 from apps.users.models import Follow, User
 from .pagination import CustomPagination
 from .permissions import IsAuthenticatedOrAdmin
@@ -16,13 +20,29 @@ class CustomUserViewSet(UserViewSet):
     queryset = User.objects.all()
     pagination_class = CustomPagination
     serializer_class = CustomUsersSerialiser
+    cursor_ordering = ('id',)
 
     def get_user(self, id):
         return get_object_or_404(User, id=id)
 
+    def get_followed_authors(self, request):
+        recipes = Recipe.objects.only(
+            'id', 'name', 'image', 'thumbnails', 'cooking_time', 'author_id')
+        recipes_limit = request.query_params.get('recipes_limit', '')
+        if recipes_limit.isdigit():
+            recipes = recipes.annotate(row_number=Window(
+                RowNumber(),
+                partition_by=F('author_id'),
+                order_by=(F('pub_date').desc(), F('id').desc())
+            )).filter(row_number__lte=int(recipes_limit))
+        return User.objects.filter(following__user=request.user).annotate(
+            is_subscribed=Value(True)
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes)).order_by('id')
+
     @action(detail=False, permission_classes=(IsAuthenticatedOrAdmin,))
     def subscriptions(self, request):
-        queryset = User.objects.filter(following__user=request.user)
+        queryset = self.get_followed_authors(request)
         pages = self.paginate_queryset(queryset)
         serializer = FollowSerializer(
             pages,
@@ -38,12 +58,15 @@ class CustomUserViewSet(UserViewSet):
         if request.user == author:
             raise exceptions.ValidationError(
                 'Подписываться на себя запрещено.')
-        _, created = Follow.objects.get_or_create(
-            user=request.user, author=author)
-        if not created:
-            raise exceptions.ValidationError(
-                'Вы уже подписаны на этого пользователя.')
-        serializer = self.get_serializer(author)
+        # Счётчик подписчиков меняет сигнал post_save - в той же транзакции.
+        with transaction.atomic():
+            _, created = Follow.objects.get_or_create(
+                user=request.user, author=author)
+            if not created:
+                raise exceptions.ValidationError(
+                    'Вы уже подписаны на этого пользователя.')
+        serializer = self.get_serializer(
+            self.get_followed_authors(request).get(pk=author.pk))
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @subscribe.mapping.delete
@@ -1,17 +1,19 @@
 from django.contrib import admin
 
-from . import models
+from . import models, shopping_lists
+from .paginators import EstimatedCountPaginator
 
 
 class RecipeIngredientsInLine(admin.TabularInline):
     model = models.Recipe.ingredients.through
     extra = 1
+    autocomplete_fields = ('ingredient',)
 
 
 @admin.register(models.Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('pk', 'name', 'measurement_unit')
-    list_filter = ('name', )
+    list_filter = ('measurement_unit', )
     search_fields = ('name', )
 
 
@@ -19,6 +21,7 @@ class IngredientAdmin(admin.ModelAdmin):
 class TagAdmin(admin.ModelAdmin):
     list_display = ('pk', 'name', 'color', 'slug')
     list_editable = ('name', 'color', 'slug')
+    search_fields = ('name', 'slug')
     empty_value_display = '-пусто-'
 
 
@@ -31,36 +34,57 @@ class RecipeAdmin(admin.ModelAdmin):
         'text',
         'cooking_time',
         'get_tags',
-        'get_favorite_count'
+        'favorites_count'
     )
     inlines = (RecipeIngredientsInLine,)
-    list_filter = ('author__email', 'tags', 'name')
-    search_fields = ('author__email', 'name',)
+    list_filter = ('tags',)
+    search_fields = ('^name', '=author__email')
+    autocomplete_fields = ('author', 'tags')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'author').prefetch_related('tags')
+
+    def save_related(self, request, form, formsets, change):
+        with shopping_lists.recipe_changing(form.instance.pk):
+            super().save_related(request, form, formsets, change)
+
     @admin.display(description='Тэги')
     def get_tags(self, obj):
         list_ = [tag.name for tag in obj.tags.all()]
         return ', '.join(list_)
 
-    @admin.display(description='В избранном')
-    def get_favorite_count(self, obj):
-        return obj.favorites.count()
-
 
 @admin.register(models.RecipeIngredient)
 class RecipeIngredientAdmin(admin.ModelAdmin):
     list_display = ('pk', 'recipe', 'ingredient', 'amount')
-    list_editable = ('recipe', 'ingredient', 'amount')
+    list_editable = ('amount',)
+    list_select_related = ('recipe', 'ingredient')
+    raw_id_fields = ('recipe',)
+    autocomplete_fields = ('ingredient',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
+    def save_model(self, request, obj, form, change):
+        with shopping_lists.recipe_changing(obj.recipe_id):
+            super().save_model(request, obj, form, change)
 
-@admin.register(models.Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'user', 'recipe')
-    list_editable = ('user', 'recipe')
+    def delete_model(self, request, obj):
+        with shopping_lists.recipe_changing(obj.recipe_id):
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_model(request, obj)
 
 
-@admin.register(models.ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
+@admin.register(models.Favorite, models.ShoppingCart)
+class UserRecipeAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'recipe')
-    list_editable = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    raw_id_fields = ('user', 'recipe')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.recipes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .fulltext import create_sqlite_index
+        post_migrate.connect(create_sqlite_index, sender=self)
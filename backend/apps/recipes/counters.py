@@ -0,0 +1,52 @@
+"""Денормализованные счётчики рецептов и пользователей.
+
+Счётчики меняются атомарным UPDATE с F() из сигналов post_save и
+post_delete моделей связей, поэтому их держат верными и API, и админка,
+и каскадные удаления. Пачечные операции без сигналов (relations, генератор
+данных) меняют счётчики сами; после bulk_create, загрузки в режиме raw и
+dbrestore расхождения исправляет команда repair_counters.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.users.models import Follow, User
+from .models import Favorite, Recipe, ShoppingCart
+
+# Модель со счётчиком, поле счётчика, модель связей и её ссылка на строку.
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'in_carts_count', ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+)
+FIELDS = {related: (model, field) for model, field, related, _ in COUNTERS}
+LINKS = {related: link for _, _, related, link in COUNTERS}
+
+
+def change(related, pk, delta):
+    """Меняет на delta счётчик объектов модели related у строки pk."""
+    change_many(related, [pk], delta)
+
+
+def change_for(instance, delta):
+    """Меняет счётчик строки, на которую ссылается объект связи."""
+    related = type(instance)
+    change(related, getattr(instance, f'{LINKS[related]}_id'), delta)
+
+
+def change_many(related, pks, delta):
+    """То же для нескольких строк одним UPDATE."""
+    if not delta or not pks:
+        return
+    model, field = FIELDS[related]
+    queryset = model.objects.filter(pk__in=pks)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def actual_count(related, link):
+    return Coalesce(Subquery(
+        related.objects.filter(**{link: OuterRef('pk')}).order_by().values(
+            link).annotate(count=Count('pk')).values('count')
+    ), 0)
@@ -0,0 +1,100 @@
+"""Ленты рецептов от авторов, на которых подписан пользователь.
+
+Лента - таблица FeedEntry: новый рецепт одним INSERT ... SELECT
+раскладывается по лентам подписчиков автора, а при подписке в ленту
+копируются уже опубликованные рецепты автора. Страница ленты - один
+диапазон индекса (user, pub_date), сколько бы ни было подписок.
+
+Рецепты авторов с числом подписчиков больше FEED_FANOUT_LIMIT при
+публикации не раскладываются: каждый читатель подтягивает их в свою
+ленту сам перед чтением (pull), начиная со следующего после последнего
+уже попавшего в ленту рецепта этого автора. Это запись внутри GET:
+INSERT ... ON CONFLICT DO NOTHING идемпотентен, а страница после него
+остаётся одним диапазоном индекса. Читатели без подписок на таких
+авторов ничего не пишут - это проверяет дешёвый EXISTS. Если автор
+опустился ниже порога, пропущенное за это время восстанавливает команда
+rebuild_feeds.
+
+Порог сравнивается с User.followers_count; счётчик меняют сигналы Follow
+(apps.recipes.counters), поэтому он верен при любом способе подписки.
+"""
+from django.db import connection
+
+from apps.users.models import Follow, User
+from foodgram.settings import FEED_FANOUT_LIMIT
+
+from .models import FeedEntry, Recipe
+
+ORDERING = ('-pub_date', '-recipe_id')
+
+FAN_OUT = '''
+    INSERT INTO {entries} (user_id, recipe_id, author_id, pub_date)
+    SELECT f.user_id, r.id, r.author_id, r.pub_date
+    FROM {recipes} r
+    JOIN {users} u ON u.id = r.author_id
+    JOIN {follows} f ON f.author_id = r.author_id
+    WHERE r.id = %s AND u.followers_count <= %s
+'''
+BACKFILL = '''
+    INSERT INTO {entries} (user_id, recipe_id, author_id, pub_date)
+    SELECT f.user_id, r.id, r.author_id, r.pub_date
+    FROM {follows} f JOIN {recipes} r ON r.author_id = f.author_id
+    WHERE {condition}
+    ON CONFLICT (user_id, recipe_id) DO NOTHING
+'''
+PULL = '''
+    INSERT INTO {entries} (user_id, recipe_id, author_id, pub_date)
+    SELECT f.user_id, r.id, r.author_id, r.pub_date
+    FROM {follows} f
+    JOIN {users} u ON u.id = f.author_id
+    JOIN {recipes} r ON r.author_id = f.author_id
+    WHERE f.user_id = %s AND u.followers_count > %s AND r.id > COALESCE((
+        SELECT MAX(e.recipe_id) FROM {entries} e
+        WHERE e.user_id = f.user_id AND e.author_id = f.author_id
+    ), 0)
+    ON CONFLICT (user_id, recipe_id) DO NOTHING
+'''
+
+
+def execute(sql, params, **kwargs):
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(
+            entries=FeedEntry._meta.db_table,
+            recipes=Recipe._meta.db_table,
+            users=User._meta.db_table,
+            follows=Follow._meta.db_table, **kwargs), params)
+
+
+def fan_out(recipe_id):
+    """Кладёт новый рецепт в ленты подписчиков автора."""
+    execute(FAN_OUT, [recipe_id, FEED_FANOUT_LIMIT])
+
+
+def follow(user_id, author_id):
+    execute(BACKFILL, [user_id, author_id],
+            condition='f.user_id = %s AND f.author_id = %s')
+
+
+def unfollow(user_id, author_id):
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def fill(first_user_id=None):
+    """Заново строит ленты пользователей с ключами от first_user_id.
+
+    Без ключа перестраиваются все ленты.
+    """
+    entries = FeedEntry.objects.all()
+    if first_user_id is not None:
+        entries = entries.filter(user_id__gte=first_user_id)
+    entries.delete()
+    execute(BACKFILL, [first_user_id or 0], condition='f.user_id >= %s')
+
+
+def get_entries(user):
+    """Лента пользователя, дополненная рецептами популярных авторов."""
+    if Follow.objects.filter(
+            user=user,
+            author__followers_count__gt=FEED_FANOUT_LIMIT).exists():
+        execute(PULL, [user.pk, FEED_FANOUT_LIMIT])
+    return FeedEntry.objects.filter(user=user).order_by(*ORDERING)
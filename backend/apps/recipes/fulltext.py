@@ -0,0 +1,122 @@
+"""Полнотекстовый поиск рецептов по названию и описанию.
+
+В PostgreSQL используется колонка search_vector (миграция
+0013_recipe_search_vector) с русской морфологией и ранжированием ts_rank.
+В SQLite - таблица FTS5 с поиском по началу слов и ранжированием bm25;
+её создаёт `create_sqlite_index` после миграций, потому что SQLite
+пересоздаёт таблицу рецептов при изменении схемы и теряет триггеры.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Recipe
+from .search import normalize
+
+TABLE = Recipe._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+# Вес совпадения в названии относительно совпадения в описании.
+NAME_WEIGHT = 10.0
+WORD = re.compile(r'\w+')
+
+
+def normalized(column):
+    """ё не считается в FTS5 буквой с диакритикой, заменяем её сами."""
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def fts_values(row):
+    name, text = normalized(f'{row}.name'), normalized(f'{row}.text')
+    return f'{row}.id, {name}, {text}'
+
+
+# Таблица без собственного содержимого: в индекс попадает нормализованный
+# текст, а удаление из него требует передать те же значения, что при вставке.
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_insert': (
+        f'AFTER INSERT ON {TABLE} BEGIN '
+        f'INSERT INTO {FTS_TABLE} (rowid, name, text) '
+        f'VALUES ({fts_values("new")}); END'
+    ),
+    f'{FTS_TABLE}_delete': (
+        f'AFTER DELETE ON {TABLE} BEGIN '
+        f'INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, name, text) '
+        f"VALUES ('delete', {fts_values('old')}); END"
+    ),
+    f'{FTS_TABLE}_update': (
+        f'AFTER UPDATE OF name, text ON {TABLE} BEGIN '
+        f'INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, name, text) '
+        f"VALUES ('delete', {fts_values('old')}); "
+        f'INSERT INTO {FTS_TABLE} (rowid, name, text) '
+        f'VALUES ({fts_values("new")}); END'
+    ),
+}
+
+
+def create_sqlite_index(using='default', **kwargs):
+    """Создаёт таблицу FTS5 и триггеры, которых не хватает.
+
+    Если чего-то не было, индекс заполняется заново по таблице рецептов.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name = %s "
+            "OR (type = 'trigger' AND tbl_name = %s)", [FTS_TABLE, TABLE])
+        existing = {name for name, in cursor.fetchall()}
+        if {FTS_TABLE, *SQLITE_TRIGGERS} <= existing:
+            return
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+            "name, text, content='', "
+            "tokenize='unicode61 remove_diacritics 2')")
+        for name, body in SQLITE_TRIGGERS.items():
+            cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('delete-all')")
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, text) '
+            f'SELECT {fts_values(TABLE)} FROM {TABLE}')
+
+
+def search_postgresql(queryset, query):
+    tsquery = "websearch_to_tsquery('russian', %s)"
+    return queryset.filter(RawSQL(
+        f'{TABLE}.search_vector @@ {tsquery}', [query],
+        output_field=BooleanField()
+    )).annotate(search_rank=RawSQL(
+        f'ts_rank({TABLE}.search_vector, {tsquery})', [query],
+        output_field=FloatField()
+    ))
+
+
+def search_sqlite(queryset, query):
+    # Морфологии в FTS5 нет, поэтому каждое слово ищется как префикс.
+    words = WORD.findall(normalize(query))
+    if not words:
+        return queryset.none()
+    match = ' '.join(f'"{word}"*' for word in words)
+    # Таблица FTS5 присоединяется один раз: bm25 считается в том же
+    # обходе совпадений, а не подзапросом на каждую строку.
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = {TABLE}.id', f'{FTS_TABLE} MATCH %s'],
+        params=[match],
+        select={'search_rank': f'-bm25({FTS_TABLE}, {NAME_WEIGHT}, 1.0)'})
+
+
+SEARCH = {'postgresql': search_postgresql, 'sqlite': search_sqlite}
+
+
+def search_recipes(queryset, query):
+    """Рецепты, подходящие под запрос, от более релевантных к менее."""
+    vendor = connections[queryset.db].vendor
+    if vendor not in SEARCH:
+        queryset = queryset.filter(name__icontains=query)
+        return queryset.order_by('-pub_date', '-id')
+    return SEARCH[vendor](queryset, query).order_by(
+        '-search_rank', '-pub_date', '-id')
@@ -0,0 +1,284 @@
+"""Генератор синтетических данных для нагрузочного тестирования.
+
+Сначала в памяти строится план: авторы рецептов, подписки, избранное и
+корзины с неравномерной (по Ципфу) популярностью авторов, рецептов,
+ингредиентов и тегов. По плану сразу считаются денормализованные
+счётчики. Затем строки пишутся пачками: COPY на PostgreSQL, иначе
+executemany (в обход auto_now_add, который затёр бы сгенерированные даты).
+Состав рецептов генерируется потоком и в памяти не хранится.
+
+Ключи назначаются заранее, начиная с текущего максимума, поэтому
+одинаковый seed на одинаковой базе даёт одинаковые данные.
+"""
+import csv
+import io
+import json
+import random
+from array import array
+from datetime import timedelta
+from functools import partial
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image
+
+from apps.users.models import Follow, User
+from foodgram.settings import RECIPE_IMAGE_QUALITY
+
+from . import feeds, shopping_lists, versions
+from .image_processing import render_derivatives
+from .images import get_derivative_names
+from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                     ShoppingCart, Tag)
+
+BATCH_SIZE = 10000
+TAGS = (('Завтрак', '#E26C2D', 'breakfast'), ('Обед', '#49B64E', 'lunch'),
+        ('Ужин', '#8775D2', 'dinner'), ('Выпечка', '#F4C542', 'bakery'),
+        ('Десерт', '#D94F9B', 'dessert'), ('Суп', '#2D9CDB', 'soup'),
+        ('Салат', '#6FCF97', 'salad'), ('Постное', '#828282', 'lenten'))
+DISHES = ('Блины', 'Борщ', 'Каша', 'Пирог', 'Салат', 'Суп', 'Омлет', 'Плов',
+          'Котлеты', 'Запеканка', 'Сырники', 'Рагу', 'Паста', 'Жаркое')
+ADJECTIVES = ('домашний', 'быстрый', 'бабушкин', 'летний', 'острый',
+              'праздничный', 'постный', 'сытный', 'лёгкий', 'пряный')
+PRODUCTS = ('молоко', 'мука', 'соль', 'сахар', 'масло', 'яйцо', 'рис',
+            'морковь', 'лук', 'картофель', 'говядина', 'сметана', 'сыр')
+UNITS = ('г', 'мл', 'шт', 'ст. л.', 'ч. л.')
+AMOUNTS = (1, 2, 3, 5, 10, 20, 50, 100, 150, 200, 250, 300, 500, 1000)
+PLACEHOLDER_SIZE = (1200, 800)
+PREPARED_TYPES = {'DateTimeField', 'DecimalField', 'JSONField'}
+
+
+def zipf_weights(size, exponent=1.1):
+    """Накопленные веса: k-й элемент в k**exponent раз реже первого."""
+    return list(accumulate(1 / (rank ** exponent)
+                           for rank in range(1, size + 1)))
+
+
+def pick(rnd, population, cum_weights, count):
+    """Не более count разных элементов с учётом популярности."""
+    if not population:
+        return []
+    return list(dict.fromkeys(
+        rnd.choices(population, cum_weights=cum_weights, k=count)))
+
+
+def next_id(model):
+    return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+
+def get_columns(model, fields):
+    return ', '.join(connection.ops.quote_name(
+        model._meta.get_field(field).column) for field in fields)
+
+
+def copy_rows(model, fields, rows, batch_size):
+    """COPY в формате CSV пачками.
+
+    Пустое поле без кавычек CSV-формат COPY читает как NULL; для
+    обязательных полей (например, image без картинок) это должна быть
+    пустая строка, поэтому они перечислены в FORCE_NOT_NULL.
+    """
+    not_null = [field for field in fields
+                if not model._meta.get_field(field).null]
+    options = 'FORMAT csv'
+    if not_null:
+        options += f', FORCE_NOT_NULL ({get_columns(model, not_null)})'
+    sql = (f'COPY {connection.ops.quote_name(model._meta.db_table)} '
+           f'({get_columns(model, fields)}) FROM STDIN WITH ({options})')
+    rows = iter(rows)
+    with connection.cursor() as cursor:
+        while True:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(
+                [json.dumps(value) if isinstance(value, dict) else value
+                 for value in row]
+                for row in islice(rows, batch_size))
+            if not buffer.tell():
+                return
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+
+
+def insert_rows(model, fields, rows, batch_size):
+    """Пачки executemany; bulk_create тратил бы время на сборку объектов.
+
+    Значения, которым нужен get_db_prep_save, преобразуются им же.
+    """
+    prepare = [
+        (partial(field.get_db_prep_save, connection=connection)
+         if field.get_internal_type() in PREPARED_TYPES else None)
+        for field in map(model._meta.get_field, fields)]
+    sql = (f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} '
+           f'({get_columns(model, fields)}) '
+           f'VALUES ({", ".join(["%s"] * len(fields))})')
+    rows = iter(rows)
+    with connection.cursor() as cursor:
+        while batch := [
+                [value if convert is None else convert(value)
+                 for convert, value in zip(prepare, row)]
+                for row in islice(rows, batch_size)]:
+            cursor.executemany(sql, batch)
+
+
+def write(model, fields, rows, batch_size=BATCH_SIZE, use_copy=True):
+    """Пишет кортежи значений полей fields пачками."""
+    if use_copy and connection.vendor == 'postgresql':
+        copy_rows(model, fields, rows, batch_size)
+    else:
+        insert_rows(model, fields, rows, batch_size)
+
+
+def make_placeholders(rnd, count):
+    """Картинки-заглушки с готовыми уменьшенными копиями."""
+    placeholders = []
+    for number in range(count):
+        buffer = io.BytesIO()
+        color = tuple(rnd.randint(60, 230) for _ in range(3))
+        Image.new('RGB', PLACEHOLDER_SIZE, color).save(
+            buffer, 'JPEG', quality=RECIPE_IMAGE_QUALITY)
+        name = default_storage.save(f'recipes/placeholder_{number}.jpg',
+                                    ContentFile(buffer.getvalue()))
+        names = get_derivative_names(name)
+        render_derivatives(default_storage.path(name), [
+            (int(width), file_format, default_storage.path(path))
+            for width, formats in names.items()
+            for file_format, path in formats.items()
+        ], RECIPE_IMAGE_QUALITY)
+        placeholders.append((name, names))
+    return placeholders
+
+
+def get_ingredients(rnd, count, save):
+    ids = list(Ingredient.objects.values_list('pk', flat=True))
+    if len(ids) >= count:
+        return ids
+    start = next_id(Ingredient)
+    names = [f'{rnd.choice(PRODUCTS)} {start + number}'
+             for number in range(count - len(ids))]
+    save(Ingredient, ('id', 'name', 'measurement_unit'), (
+        (start + number, name, rnd.choice(UNITS))
+        for number, name in enumerate(names)))
+    return ids + list(range(start, start + len(names)))
+
+
+def get_tags():
+    existing = set(Tag.objects.values_list('slug', flat=True))
+    Tag.objects.bulk_create(
+        Tag(name=name, color=color, slug=slug)
+        for name, color, slug in TAGS if slug not in existing)
+    return list(Tag.objects.values_list('pk', flat=True))
+
+
+def generate(users, recipes, follows=10, favorites=20, carts=5,
+             ingredients=2000, images=0, days=730, seed=42, password=None,
+             batch_size=BATCH_SIZE, use_copy=True, log=None):
+    """Создаёт данные и возвращает ключи первого пользователя и рецепта.
+
+    Без password пользователи получают непригодный для входа пароль.
+    Ход работы передаётся в log (команда передаёт self.stdout.write).
+    """
+    rnd = random.Random(seed)
+    log = log or (lambda message: None)
+    save = partial(write, batch_size=batch_size, use_copy=use_copy)
+    now = timezone.now()
+    start = now - timedelta(days=days)
+    user_span = (now - start) / max(users, 1)
+    recipe_span = (now - start) / max(recipes, 1)
+    first_user, first_recipe = next_id(User), next_id(Recipe)
+    user_ids = range(first_user, first_user + users)
+    recipe_ids = range(first_recipe, first_recipe + recipes)
+    user_weights = zipf_weights(users)
+    recipe_weights = zipf_weights(recipes)
+
+    # План: у популярных авторов больше рецептов и подписчиков.
+    authors = array('q', rnd.choices(user_ids, cum_weights=user_weights,
+                                     k=recipes))
+    recipes_count = array('q', bytes(8 * users))
+    for author in authors:
+        recipes_count[author - first_user] += 1
+    plans = {}
+    for model, per_user, targets, weights in (
+            (Follow, follows, user_ids, user_weights),
+            (Favorite, favorites, recipe_ids, recipe_weights),
+            (ShoppingCart, carts, recipe_ids, recipe_weights)):
+        pairs = array('q')
+        counts = array('q', bytes(8 * len(targets)))
+        for user in user_ids:
+            for target in pick(rnd, targets, weights, per_user):
+                if target != user or model is not Follow:
+                    pairs.extend((user, target))
+                    counts[target - targets.start] += 1
+        plans[model] = pairs, counts
+
+    with transaction.atomic():
+        ingredient_ids = get_ingredients(rnd, ingredients, save)
+        ingredient_weights = zipf_weights(len(ingredient_ids), 0.9)
+        rnd.shuffle(ingredient_ids)
+        tag_ids = get_tags()
+        placeholders = make_placeholders(rnd, images)
+
+        log(f'Пользователи: {users}')
+        password = make_password(password)
+        followers = plans[Follow][1]
+        save(User, ('id', 'email', 'username', 'first_name', 'last_name',
+                    'password', 'is_superuser', 'is_staff', 'is_active',
+                    'date_joined', 'joined', 'recipes_count',
+                    'followers_count'), (
+            (pk, f'user{pk}@example.com', f'user{pk}', 'Имя',
+             f'Фамилия {pk}', password, False, False, True,
+             *[start + user_span * (pk - first_user)] * 2,
+             recipes_count[pk - first_user], followers[pk - first_user])
+            for pk in user_ids))
+
+        log(f'Рецепты: {recipes}')
+        favorited, carted = plans[Favorite][1], plans[ShoppingCart][1]
+
+        def recipe_rows():
+            for pk in recipe_ids:
+                image, thumbnails = (rnd.choice(placeholders)
+                                     if placeholders else ('', {}))
+                number = pk - first_recipe
+                yield (pk, authors[number],
+                       f'{rnd.choice(DISHES)} {rnd.choice(ADJECTIVES)} {pk}',
+                       ' '.join(rnd.choices(DISHES + PRODUCTS, k=40)),
+                       min(600, max(1, round(rnd.lognormvariate(3.3, 0.6)))),
+                       image, thumbnails, favorited[number], carted[number],
+                       start + recipe_span * number)
+        save(Recipe, ('id', 'author_id', 'name', 'text', 'cooking_time',
+                      'image', 'thumbnails', 'favorites_count',
+                      'in_carts_count', 'pub_date'), recipe_rows())
+
+        log('Теги и состав рецептов')
+        tag_weights = zipf_weights(len(tag_ids), 0.8)
+        save(Recipe.tags.through, ('recipe_id', 'tag_id'), (
+            (pk, tag) for pk in recipe_ids for tag in pick(
+                rnd, tag_ids, tag_weights, rnd.choice((1, 1, 2, 2, 2, 3)))))
+        save(RecipeIngredient, ('recipe_id', 'ingredient_id', 'amount'), (
+            (pk, ingredient, rnd.choice(AMOUNTS)) for pk in recipe_ids
+            for ingredient in pick(
+                rnd, ingredient_ids, ingredient_weights,
+                max(2, min(20, round(rnd.gauss(8, 3)))))))
+
+        for model, (pairs, _) in plans.items():
+            log(f'{model._meta.verbose_name_plural}: {len(pairs) // 2}')
+            target = 'author_id' if model is Follow else 'recipe_id'
+            save(model, ('user_id', target), (
+                (pairs[index], pairs[index + 1])
+                for index in range(0, len(pairs), 2)))
+        shopping_lists.fill(first_user)
+        feeds.fill(first_user)
+
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [
+                    User, Ingredient, Recipe, Recipe.tags.through,
+                    RecipeIngredient, Favorite, ShoppingCart, Follow]):
+                cursor.execute(sql)
+    versions.bump_versions(versions.RECIPES, versions.TAGS,
+                           versions.INGREDIENTS, versions.USERS)
+    return first_user, first_recipe
@@ -0,0 +1,27 @@
+"""Ресайз картинок рецептов.
+
+Модуль не импортирует Django, чтобы его можно было выполнять в отдельном
+процессе пула без настройки приложения.
+"""
+import os
+
+from PIL import Image, ImageOps
+
+FORMATS = {'jpeg': 'JPEG', 'webp': 'WEBP'}
+
+
+def render_derivatives(source, targets, quality):
+    """Сохраняет уменьшенные копии картинки.
+
+    targets - список (ширина, формат, путь); копии строятся от большей
+    ширины к меньшей, каждая из предыдущей.
+    """
+    with Image.open(source) as image:
+        widest = max(width for width, _, _ in targets)
+        image.draft('RGB', (widest, widest))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        for width, file_format, path in sorted(targets, reverse=True):
+            image.thumbnail((width, image.height), Image.LANCZOS)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            image.save(path, FORMATS[file_format], quality=quality,
+                       optimize=True)
@@ -0,0 +1,110 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import PurePosixPath
+
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+
+from foodgram.settings import (IMAGE_WORKERS, RECIPE_IMAGE_FORMATS,
+                               RECIPE_IMAGE_QUALITY, RECIPE_IMAGE_WIDTHS)
+
+from . import versions
+from .image_processing import render_derivatives
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = 'recipes/derivatives'
+EXTENSIONS = {'jpeg': 'jpg', 'webp': 'webp'}
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_derivative_names(image_name):
+    # Расширение входит в имя: у photo.png и photo.jpg копии разные.
+    stem = PurePosixPath(image_name).name.replace('.', '_')
+    return {
+        str(width): {
+            file_format: (f'{DERIVATIVES_DIR}/{stem}_{width}.'
+                          f'{EXTENSIONS[file_format]}')
+            for file_format in RECIPE_IMAGE_FORMATS
+        }
+        for width in RECIPE_IMAGE_WIDTHS
+    }
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'))
+    return _executor
+
+
+def schedule(recipe):
+    """Ставит в очередь построение копий картинки после коммита."""
+    if not recipe.image:
+        return
+    names = get_derivative_names(recipe.image.name)
+    if recipe.thumbnails == names:
+        return
+    transaction.on_commit(partial(
+        submit, recipe.pk, recipe.image.name, names, recipe.thumbnails))
+
+
+def submit(pk, image_name, names, old_names):
+    targets = [(int(width), file_format, default_storage.path(name))
+               for width, formats in names.items()
+               for file_format, name in formats.items()]
+    args = (default_storage.path(image_name), targets, RECIPE_IMAGE_QUALITY)
+    if not IMAGE_WORKERS:
+        render_derivatives(*args)
+        save(pk, image_name, names, old_names)
+        return
+    future = get_executor().submit(render_derivatives, *args)
+    future.add_done_callback(
+        partial(on_done, pk, image_name, names, old_names))
+
+
+def on_done(pk, image_name, names, old_names, future):
+    try:
+        future.result()
+        save(pk, image_name, names, old_names)
+    except Exception:
+        logger.exception('Не удалось обработать картинку %s', image_name)
+    finally:
+        connections.close_all()
+
+
+def iter_names(names):
+    for formats in names.values():
+        yield from formats.values()
+
+
+def delete_files(names, keep=None):
+    """Удаляет копии, если на них больше не ссылается ни один рецепт:
+    рецепты из generate_fixtures делят одни картинки-заглушки."""
+    if not names or Recipe.objects.filter(thumbnails=names).exists():
+        return
+    keep = set(iter_names(keep or {}))
+    for name in iter_names(names):
+        if name not in keep:
+            default_storage.delete(name)
+
+
+def save(pk, image_name, names, old_names):
+    """Записывает копии в рецепт; вызывается уже после коммита."""
+    if Recipe.objects.filter(pk=pk, image=image_name).update(
+            thumbnails=names):
+        # update() не шлёт сигналов: кэш ответов сбрасывается здесь.
+        versions.bump_versions(versions.RECIPES, versions.recipe(pk))
+        delete_files(old_names, keep=names)
+    else:
+        # Картинку успели заменить или рецепт удалён - копии не нужны.
+        delete_files(names)
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.recipes import shopping_lists
+from apps.recipes.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    """Rebuild shopping lists from carts and compare with the stored rows"""
+
+    BATCH_SIZE = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true',
+                            help='Исправить расходящиеся строки.')
+
+    def handle(self, *args, **options):
+        missing, extra, wrong = [], [], []
+        with transaction.atomic():
+            differences = shopping_lists.compare(
+                shopping_lists.stored_items().iterator(),
+                shopping_lists.expected_items().iterator())
+            for key, stored, expected in differences:
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        f'user={key[0]} ingredient={key[1]}: '
+                        f'{stored} != {expected}')
+                if stored is None:
+                    missing.append((key, expected))
+                elif expected is None:
+                    extra.append(key)
+                else:
+                    wrong.append((key, expected))
+            if options['fix']:
+                self.fix(missing, extra, wrong)
+        self.stdout.write(f'missing {len(missing)}, extra {len(extra)}, '
+                          f'wrong {len(wrong)}')
+        if (missing or extra or wrong) and not options['fix']:
+            raise CommandError('Списки покупок расходятся с корзинами.')
+
+    def fix(self, missing, extra, wrong):
+        for user_id, ingredient_id in extra:
+            ShoppingListItem.objects.filter(
+                user_id=user_id, ingredient_id=ingredient_id).delete()
+        for (user_id, ingredient_id), amount in wrong:
+            ShoppingListItem.objects.filter(
+                user_id=user_id, ingredient_id=ingredient_id
+            ).update(amount=amount)
+        ShoppingListItem.objects.bulk_create(
+            [ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id,
+                              amount=amount)
+             for (user_id, ingredient_id), amount in missing],
+            batch_size=self.BATCH_SIZE)
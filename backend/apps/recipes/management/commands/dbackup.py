@@ -1,12 +1,48 @@
 from datetime import datetime
 
-from django.core.management import BaseCommand, call_command
+from django.core.management import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.recipes import backups
+from foodgram.settings import BACKUP_JOBS
 
 
 class Command(BaseCommand):
+    """Stream a compressed backup of the database, one file per model"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=f'db-{datetime.now().strftime("%Y-%m-%d-%H-%M-%S")}',
+            help='Папка для копии.')
+        parser.add_argument('--compression', choices=backups.EXTENSIONS,
+                            default='gzip')
+        parser.add_argument('--jobs', type=int, default=BACKUP_JOBS,
+                            help='Сколько моделей выгружать параллельно.')
+        increment = parser.add_mutually_exclusive_group()
+        increment.add_argument(
+            '--since', help='Только строки, созданные после этого момента.')
+        increment.add_argument(
+            '--incremental', metavar='BACKUP',
+            help='Только строки, созданные после копии BACKUP.')
 
     def handle(self, *args, **options):
-        call_command(
-            'dumpdata',
-            f'--output=db-{datetime.now().strftime("%Y-%m-%d-%H-%M-%S")}.json'
-        )
+        since = options['since']
+        if options['incremental']:
+            since = backups.read_manifest(options['incremental'])['created']
+        if since:
+            since = parse_datetime(since)
+            if since is None:
+                raise CommandError('Неверный формат даты.')
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        try:
+            manifest = backups.backup(
+                options['output'], options['compression'],
+                options['jobs'], since)
+        except RuntimeError as error:
+            raise CommandError(error)
+        for table in manifest['models']:
+            self.stdout.write(f'{table["model"]}: {table["count"]}')
+        self.stdout.write(f'Копия записана в {options["output"]}')
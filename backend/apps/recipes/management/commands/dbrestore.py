@@ -0,0 +1,26 @@
+from django.core.management import BaseCommand, CommandError, call_command
+
+from apps.recipes import backups
+from foodgram.settings import BACKUP_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    """Restore a backup made by dbackup; increments go after the full one"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('backups', nargs='+', metavar='BACKUP',
+                            help='Папки копий в порядке создания.')
+        parser.add_argument('--batch-size', type=int,
+                            default=BACKUP_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        for directory in options['backups']:
+            try:
+                counts = backups.restore(directory, options['batch_size'])
+            except (OSError, RuntimeError) as error:
+                raise CommandError(error)
+            for model, count in counts.items():
+                self.stdout.write(f'{model}: {count}')
+            self.stdout.write(f'Копия {directory} восстановлена')
+        # Инкремент не несёт новых значений счётчиков старых строк.
+        call_command('repair_counters', stdout=self.stdout)
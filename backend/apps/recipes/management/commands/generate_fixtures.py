@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recipes import generator
+
+
+class Command(BaseCommand):
+    """Generate synthetic users, recipes and relations for load testing"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=10,
+                            help='Подписок на пользователя.')
+        parser.add_argument('--favorites', type=int, default=20,
+                            help='Избранных рецептов на пользователя.')
+        parser.add_argument('--carts', type=int, default=5,
+                            help='Рецептов в корзине пользователя.')
+        parser.add_argument('--ingredients', type=int, default=2000,
+                            help='Дополнить справочник до этого размера.')
+        parser.add_argument('--images', type=int, default=0,
+                            help='Число картинок-заглушек; 0 - без картинок.')
+        parser.add_argument('--days', type=int, default=730,
+                            help='За сколько дней распределить даты.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--password',
+                            help='Пароль пользователей; по умолчанию вход '
+                                 'невозможен.')
+        parser.add_argument('--batch-size', type=int,
+                            default=generator.BATCH_SIZE)
+        parser.add_argument('--no-copy', action='store_true',
+                            help='Не использовать COPY в PostgreSQL.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['recipes'] < 0:
+            raise CommandError('Нужен хотя бы один пользователь.')
+        start = time.perf_counter()
+        first_user, first_recipe = generator.generate(
+            options['users'], options['recipes'],
+            follows=options['follows'], favorites=options['favorites'],
+            carts=options['carts'], ingredients=options['ingredients'],
+            images=options['images'], days=options['days'],
+            seed=options['seed'], password=options['password'],
+            batch_size=options['batch_size'],
+            use_copy=not options['no_copy'], log=self.stdout.write)
+        self.stdout.write(
+            f'Готово за {time.perf_counter() - start:.1f} с: пользователи '
+            f'с id {first_user}, рецепты с id {first_recipe}')
@@ -1,29 +1,161 @@
 import csv
+import io
+import json
+from itertools import chain, islice
+from pathlib import Path
 
-from django.core.management.base import BaseCommand
-from progress.bar import IncrementalBar
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from progress.counter import Counter
 
+from apps.recipes import versions
 from apps.recipes.models import Ingredient
 
+CHUNK_SIZE = 64 * 1024
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def read_json_array(file, chunk_size=CHUNK_SIZE):
+    """Элементы JSON-массива по одному: в памяти - один кусок файла."""
+    decoder = json.JSONDecoder()
+    buffer, position = '', 0
+    while True:
+        while position < len(buffer) and buffer[position] in ', \t\r\n':
+            position += 1
+        if position == len(buffer):
+            buffer, position = file.read(chunk_size), 0
+            if not buffer:
+                raise json.JSONDecodeError('Массив не закрыт', '', 0)
+            continue
+        if buffer[position] == ']':
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # Элемент обрезан границей куска - дочитываем.
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield item
+
+
+def get_fields(file, item):
+    try:
+        return item['name'], item['measurement_unit']
+    except (KeyError, TypeError):
+        raise CommandError(
+            f'{file.name}: в записи нет name или measurement_unit: {item!r}')
+
+
+def read_json(file):
+    """Читает JSON-массив или JSON Lines с полями name, measurement_unit.
+
+    Оба формата читаются потоком, файл целиком в память не загружается.
+    """
+    first = file.read(1)
+    while first.isspace():
+        first = file.read(1)
+    if first == '[':
+        items = read_json_array(file)
+    else:
+        items = (json.loads(line)
+                 for line in chain([first + file.readline()], file)
+                 if line.strip())
+    try:
+        for item in items:
+            yield get_fields(file, item)
+    except json.JSONDecodeError as error:
+        raise CommandError(f'{file.name}: неверный JSON: {error}')
+
+
+READERS = {'csv': read_csv, 'json': read_json, 'jsonl': read_json}
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
 
 class Command(BaseCommand):
     """Load ingredients to DB"""
 
     FILE = 'ingredients.csv'
+    BATCH_SIZE = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=self.FILE)
+        parser.add_argument('--format', choices=READERS,
+                            help='По умолчанию - по расширению файла.')
+        parser.add_argument('--batch-size', type=int,
+                            default=self.BATCH_SIZE)
+        parser.add_argument('--no-copy', action='store_true',
+                            help='Не использовать COPY в PostgreSQL.')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        use_copy = (connection.vendor == 'postgresql'
+                    and not options['no_copy'])
+        counter = Counter(f'{path.name} ')
+        with open(path, 'r', encoding='utf-8') as file:
+            rows = READERS[file_format](file)
+            if use_copy:
+                total, created = self.copy(
+                    rows, options['batch_size'], counter)
+            else:
+                total, created = self.insert(
+                    rows, options['batch_size'], counter)
+        counter.finish()
+        versions.bump_version(versions.INGREDIENTS)
+        self.stdout.write(f'Created total: {created}, '
+                          f'skipped: {total - created}')
+
+    def insert(self, rows, batch_size, counter):
+        """Вставка пачками; созданные считает сама БД, а не разница
+        count() до и после, которую сбили бы параллельные записи."""
+        table = Ingredient._meta.db_table
+        total = created = 0
+        with connection.cursor() as cursor:
+            for batch in batches(rows, batch_size):
+                cursor.execute(
+                    f'INSERT INTO {table} (name, measurement_unit) VALUES '
+                    + ', '.join(['(%s, %s)'] * len(batch))
+                    + ' ON CONFLICT DO NOTHING',
+                    [value for row in batch for value in row])
+                created += cursor.rowcount
+                total += len(batch)
+                counter.next(len(batch))
+        return total, created
 
-    def handle(self, *args, **kwargs):
+    @transaction.atomic
+    def copy(self, rows, batch_size, counter):
+        table = Ingredient._meta.db_table
         total = 0
-        with open(self.FILE, 'r', encoding='utf-8') as file:
-            progress_bar = IncrementalBar(
-                self.FILE.ljust(10), max=len(file.readlines()))
-        with open(self.FILE, 'r', encoding='utf-8') as file:
-            reader = csv.reader(file)
-            for row in reader:
-                progress_bar.next()
-                _, created = Ingredient.objects.get_or_create(
-                    name=row[0],
-                    measurement_unit=row[1])
-                if created:
-                    total += 1
-            progress_bar.finish()
-        self.stdout.write(f'Created total: {total}')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredient_import '
+                '(name text, measurement_unit text) ON COMMIT DROP')
+            for batch in batches(rows, batch_size):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    'COPY ingredient_import FROM STDIN WITH (FORMAT csv, '
+                    'FORCE_NOT_NULL (name, measurement_unit))', buffer)
+                total += len(batch)
+                counter.next(len(batch))
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT DISTINCT name, measurement_unit '
+                'FROM ingredient_import ON CONFLICT DO NOTHING')
+            return total, cursor.rowcount
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.recipes import images
+from apps.recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """Build resized copies for recipe images that lack them"""
+
+    def handle(self, *args, **kwargs):
+        total = 0
+        recipes = Recipe.objects.exclude(image='').only(
+            'id', 'image', 'thumbnails')
+        for recipe in recipes.iterator():
+            if recipe.thumbnails != images.get_derivative_names(
+                    recipe.image.name):
+                images.schedule(recipe)
+                total += 1
+        if images.IMAGE_WORKERS:
+            images.get_executor().shutdown(wait=True)
+        self.stdout.write(f'Scheduled total: {total}')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.recipes import feeds
+from apps.recipes.models import FeedEntry
+
+
+class Command(BaseCommand):
+    """Rebuild followed-author feeds from subscriptions and recipes"""
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            feeds.fill()
+        self.stdout.write(f'feed entries: {FeedEntry.objects.count()}')
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Max, Min
+
+from apps.recipes import counters
+
+
+class Command(BaseCommand):
+    """Recompute denormalized counters and fix rows that drifted"""
+
+    BATCH_SIZE = 10000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=self.BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только посчитать расхождения.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model, field, related, link in counters.COUNTERS:
+            actual = counters.actual_count(related, link)
+            bounds = model.objects.aggregate(low=Min('pk'), high=Max('pk'))
+            fixed = 0
+            if bounds['low'] is not None:
+                for low in range(bounds['low'], bounds['high'] + 1,
+                                 batch_size):
+                    drifted = model.objects.filter(
+                        pk__gte=low, pk__lt=low + batch_size
+                    ).annotate(actual=actual).exclude(**{field: F('actual')})
+                    if options['dry_run']:
+                        fixed += drifted.count()
+                    else:
+                        fixed += model.objects.filter(
+                            pk__in=drifted.values('pk')
+                        ).update(**{field: actual})
+            self.stdout.write(f'{model.__name__}.{field}: drifted {fixed}')
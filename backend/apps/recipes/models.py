@@ -4,17 +4,61 @@ from django.core.validators import (MinValueValidator, RegexValidator,
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
-from apps.users.models import User
+from apps.users.models import Follow, User
 from foodgram.settings import MAX_LENGTH_INGREDIENTFIELDS, REGEX_COLOR_TAG
 
+USER_FLAGS = ('is_favorited', 'is_in_shopping_cart', 'is_subscribed')
 
-class IngredientsQuerySet(models.QuerySet):
-    def ingredients(self, request):
-        return RecipeIngredient.objects.filter(
-            recipe__shopping__user=request.user).values(
+
+class ShoppingListQuerySet(models.QuerySet):
+    def for_download(self, user):
+        return self.filter(user=user).values(
             'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(amount=models.Sum('amount'))
+            'ingredient__measurement_unit',
+            'amount'
+        ).order_by('ingredient__name')
+
+
+class RecipeQuerySet(models.QuerySet):
+    def with_user_flags(self, user, flags=USER_FLAGS):
+        if not user.is_authenticated:
+            return self.annotate(**dict.fromkeys(flags, models.Value(False)))
+        subqueries = {
+            'is_favorited': Favorite.objects.filter(
+                user=user, recipe=models.OuterRef('pk')),
+            'is_in_shopping_cart': ShoppingCart.objects.filter(
+                user=user, recipe=models.OuterRef('pk')),
+            'is_subscribed': Follow.objects.filter(
+                user=user, author=models.OuterRef('author')),
+        }
+        return self.annotate(**{
+            flag: models.Exists(subqueries[flag]) for flag in flags})
+
+    def for_read(self, user, fields=None):
+        """Рецепты для RecipeReadSerializer.
+
+        fields - выводимые поля сериализатора (None - все): связи,
+        подзапросы и текст рецепта загружаются, только если нужны им.
+        """
+        def wanted(name):
+            return fields is None or name in fields
+
+        queryset = self
+        if wanted('author'):
+            queryset = queryset.select_related('author')
+        if wanted('tags'):
+            queryset = queryset.prefetch_related('tags')
+        if wanted('ingredients'):
+            queryset = queryset.prefetch_related(models.Prefetch(
+                'recipes',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ))
+        if not wanted('text'):
+            queryset = queryset.defer('text')
+        # is_subscribed выводится внутри author.
+        return queryset.with_user_flags(user, [
+            flag for flag in USER_FLAGS
+            if wanted('author' if flag == 'is_subscribed' else flag)])
 
 
 class Ingredient(models.Model):
@@ -96,6 +140,22 @@ class Recipe(models.Model):
         blank=True,
         validators=[validate_image_file_extension]
     )
+    thumbnails = models.JSONField(
+        verbose_name=_('Уменьшенные копии картинки'),
+        default=dict,
+        blank=True,
+        editable=False
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name=_('В избранном'),
+        default=0,
+        editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name=_('В списках покупок'),
+        default=0,
+        editable=False
+    )
     pub_date = models.DateTimeField(
         verbose_name=_('Дата публикации'),
         auto_now_add=True
@@ -123,11 +183,19 @@ class Recipe(models.Model):
         validators=[validate_unicode_slug]
     )
 
+    objects = RecipeQuerySet.as_manager()
+
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = _('Рецепт')
         verbose_name_plural = _('Рецепты')
         default_related_name = 'recipes'
+        indexes = [
+            models.Index(fields=('-pub_date', '-id'),
+                         name='recipe_pub_date_id_idx'),
+            models.Index(fields=('author', '-pub_date'),
+                         name='recipe_author_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -212,8 +280,6 @@ class ShoppingCart(models.Model):
         verbose_name=_('Список покупок')
     )
 
-    objects = IngredientsQuerySet.as_manager()
-
     class Meta:
         verbose_name = _('Список покупок')
         verbose_name_plural = _('Списки покупок')
@@ -227,3 +293,90 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'Рецепт {self.recipe} в списке покупок у {self.user}'
+
+
+class ShoppingListItem(models.Model):
+    """Сумма ингредиента по всем рецептам в корзине пользователя.
+
+    Поддерживается apps.recipes.shopping_lists при изменении корзины и
+    состава рецептов; сверяется командой check_shopping_lists.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name=_('Пользователь')
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name=_('Ингредиент')
+    )
+    amount = models.DecimalField(
+        verbose_name=_('Количество'),
+        max_digits=12,
+        decimal_places=2
+    )
+
+    objects = ShoppingListQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('Строка списка покупок')
+        verbose_name_plural = _('Строки списков покупок')
+        default_related_name = 'shopping_list'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.ingredient} - {self.amount} у {self.user}'
+
+
+class FeedEntry(models.Model):
+    """Рецепт в ленте подписчика автора.
+
+    Поддерживается apps.recipes.feeds при публикации рецептов и
+    подписках; страница ленты читается по индексу (user, pub_date).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name=_('Подписчик')
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name=_('Рецепт')
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('Автор рецепта')
+    )
+    pub_date = models.DateTimeField(
+        verbose_name=_('Дата публикации')
+    )
+
+    class Meta:
+        verbose_name = _('Запись ленты')
+        verbose_name_plural = _('Записи лент')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(fields=('user', '-pub_date', '-recipe'),
+                         name='feed_user_pub_date_idx'),
+            models.Index(fields=('user', 'author', 'recipe'),
+                         name='feed_user_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'Рецепт {self.recipe} в ленте {self.user}'
@@ -0,0 +1,55 @@
+"""Избранное и корзина: добавление и удаление рецептов пачкой.
+
+Строки связей вставляются одним INSERT ... ON CONFLICT DO NOTHING и
+удаляются одним DELETE; оба возвращают ключи действительно затронутых
+рецептов. По ним в той же транзакции меняются счётчики и, для корзины,
+списки покупок. Повторный или параллельный запрос ничего не меняет и
+не упирается в ограничение уникальности.
+"""
+from django.db import connection, transaction
+
+from . import counters, shopping_lists
+from .models import Recipe, ShoppingCart
+
+# Несуществующие рецепты отсекает SELECT, а не внешний ключ.
+INSERT = '''
+    INSERT INTO {table} (user_id, recipe_id)
+    SELECT %s, id FROM {recipes} WHERE id IN ({recipe_ids})
+    ON CONFLICT (user_id, recipe_id) DO NOTHING
+    RETURNING recipe_id
+'''
+DELETE = '''
+    DELETE FROM {table} WHERE user_id = %s AND recipe_id IN ({recipe_ids})
+    RETURNING recipe_id
+'''
+
+
+def execute(sql, model, user_id, recipe_ids):
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+    if not recipe_ids:
+        return []
+    sql = sql.format(table=model._meta.db_table,
+                     recipes=Recipe._meta.db_table,
+                     recipe_ids=', '.join(['%s'] * len(recipe_ids)))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, *recipe_ids])
+        return sorted(recipe_id for recipe_id, in cursor.fetchall())
+
+
+def change(sql, sign, model, user_id, recipe_ids):
+    with transaction.atomic():
+        changed = execute(sql, model, user_id, recipe_ids)
+        counters.change_many(model, changed, sign)
+        if model is ShoppingCart:
+            shopping_lists.apply_recipes(user_id, changed, sign)
+    return changed
+
+
+def add(model, user_id, recipe_ids):
+    """Добавляет рецепты; возвращает ключи тех, которых ещё не было."""
+    return change(INSERT, 1, model, user_id, recipe_ids)
+
+
+def remove(model, user_id, recipe_ids):
+    """Убирает рецепты; возвращает ключи действительно удалённых."""
+    return change(DELETE, -1, model, user_id, recipe_ids)
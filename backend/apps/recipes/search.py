@@ -0,0 +1,102 @@
+import threading
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+from foodgram.settings import INGREDIENT_SEARCH_LIMIT
+
+from . import versions
+from .models import Ingredient
+
+TRIGRAM_LENGTH = 3
+
+
+def normalize(text):
+    """Приводит строку к виду для сравнения: casefold, ё -> е, пробелы."""
+    return ' '.join(text.casefold().replace('ё', 'е').split())
+
+
+def trigrams(text):
+    return {text[i:i + TRIGRAM_LENGTH]
+            for i in range(len(text) - TRIGRAM_LENGTH + 1)}
+
+
+class IngredientIndex:
+    """Индекс названий ингредиентов для автодополнения.
+
+    Названия хранятся отсортированными, поэтому совпадения по префиксу
+    находятся бинарным поиском, а совпадения по подстроке - через списки
+    позиций для каждой триграммы.
+    """
+
+    def __init__(self, rows):
+        rows = sorted(((normalize(name), pk, name, unit)
+                       for pk, name, unit in rows),
+                      key=lambda row: (row[0], row[1]))
+        self._keys = [row[0] for row in rows]
+        self._rows = [row[1:] for row in rows]
+        postings = defaultdict(lambda: array('I'))
+        for position, key in enumerate(self._keys):
+            for trigram in trigrams(key):
+                postings[trigram].append(position)
+        self._postings = dict(postings)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _prefix(self, query, limit):
+        positions = []
+        position = bisect_left(self._keys, query)
+        while (len(positions) < limit and position < len(self._keys)
+               and self._keys[position].startswith(query)):
+            positions.append(position)
+            position += 1
+        return positions
+
+    def _substring(self, query, limit):
+        grams = trigrams(query)
+        if not grams:
+            return []
+        candidates = min((self._postings.get(gram, ()) for gram in grams),
+                         key=len)
+        positions = []
+        for position in candidates:
+            key = self._keys[position]
+            if query in key and not key.startswith(query):
+                positions.append(position)
+                if len(positions) >= limit:
+                    break
+        return positions
+
+    def search(self, query, limit=INGREDIENT_SEARCH_LIMIT):
+        """Сначала совпадения по префиксу, затем по подстроке."""
+        query = normalize(query)
+        if not query:
+            return []
+        positions = self._prefix(query, limit)
+        if len(positions) < limit:
+            positions += self._substring(query, limit - len(positions))
+        return [self._rows[position] for position in positions]
+
+
+_index = None
+_index_version = None
+_lock = threading.Lock()
+
+
+def get_index():
+    """Индекс текущего процесса; перестраивается при смене версии."""
+    global _index, _index_version
+    version = versions.get_version(versions.INGREDIENTS)
+    if _index is None or _index_version != version:
+        with _lock:
+            if _index is None or _index_version != version:
+                _index = IngredientIndex(Ingredient.objects.values_list(
+                    'id', 'name', 'measurement_unit').iterator())
+                _index_version = version
+    return _index
+
+
+def search_ingredients(query, limit=INGREDIENT_SEARCH_LIMIT):
+    return [Ingredient(id=pk, name=name, measurement_unit=unit)
+            for pk, name, unit in get_index().search(query, limit)]
@@ -0,0 +1,150 @@
+"""Материализованные списки покупок: строка на (пользователь, ингредиент).
+
+Когда рецепт попадает в корзину или покидает её, количества его
+ингредиентов прибавляются к строкам пользователя или вычитаются из них
+одним INSERT ... ON CONFLICT DO UPDATE. При правке состава рецепта,
+лежащего в корзинах, старый состав вычитается у всех его покупателей,
+а новый прибавляется. Строки с нулевым количеством удаляются.
+"""
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import F, Sum
+
+from .models import RecipeIngredient, ShoppingCart, ShoppingListItem
+
+# Меньше половины шага decimal_places=2: на SQLite суммы считаются во float.
+EMPTY_AMOUNT = Decimal('0.005')
+CENT = Decimal('0.01')
+
+UPSERT = '''
+    INSERT INTO {items} (user_id, ingredient_id, amount)
+    SELECT c.user_id, ri.ingredient_id, %s * SUM(ri.amount)
+    FROM {carts} c JOIN {rows} ri ON ri.recipe_id = c.recipe_id
+    WHERE c.recipe_id = %s{user_filter}
+    GROUP BY c.user_id, ri.ingredient_id
+    ON CONFLICT (user_id, ingredient_id)
+    DO UPDATE SET amount = {items}.amount + EXCLUDED.amount
+'''
+USER_UPSERT = '''
+    INSERT INTO {items} (user_id, ingredient_id, amount)
+    SELECT %s, ri.ingredient_id, %s * SUM(ri.amount)
+    FROM {rows} ri
+    WHERE ri.recipe_id IN ({recipe_ids})
+    GROUP BY ri.ingredient_id
+    ON CONFLICT (user_id, ingredient_id)
+    DO UPDATE SET amount = {items}.amount + EXCLUDED.amount
+'''
+FILL = '''
+    INSERT INTO {items} (user_id, ingredient_id, amount)
+    SELECT c.user_id, ri.ingredient_id, SUM(ri.amount)
+    FROM {carts} c JOIN {rows} ri ON ri.recipe_id = c.recipe_id
+    WHERE c.user_id >= %s
+    GROUP BY c.user_id, ri.ingredient_id
+'''
+
+
+def format_sql(sql, **kwargs):
+    return sql.format(
+        items=ShoppingListItem._meta.db_table,
+        carts=ShoppingCart._meta.db_table,
+        rows=RecipeIngredient._meta.db_table, **kwargs)
+
+
+def apply_recipe(recipe_id, sign, user_id=None):
+    """Прибавляет (sign=1) или вычитает (sign=-1) состав рецепта.
+
+    Затрагиваются корзины с этим рецептом: одна, если задан user_id,
+    иначе все. Строка корзины в этот момент должна существовать.
+    """
+    params = [sign, recipe_id]
+    user_filter = ''
+    if user_id is not None:
+        user_filter = ' AND c.user_id = %s'
+        params.append(user_id)
+    with connection.cursor() as cursor:
+        cursor.execute(format_sql(UPSERT, user_filter=user_filter), params)
+    if sign < 0:
+        empty = ShoppingListItem.objects.filter(amount__lt=EMPTY_AMOUNT)
+        if user_id is not None:
+            empty.filter(user_id=user_id).delete()
+        else:
+            empty.filter(user__shopping__recipe_id=recipe_id).delete()
+
+
+def apply_recipes(user_id, recipe_ids, sign):
+    """Прибавляет или вычитает у пользователя состав нескольких рецептов.
+
+    Корзина не читается: вызывается после того, как строки корзины
+    вставлены или удалены, с ключами действительно затронутых рецептов.
+    """
+    if not recipe_ids:
+        return
+    sql = format_sql(USER_UPSERT,
+                     recipe_ids=', '.join(['%s'] * len(recipe_ids)))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, sign, *recipe_ids])
+    if sign < 0:
+        ShoppingListItem.objects.filter(
+            user_id=user_id, amount__lt=EMPTY_AMOUNT).delete()
+
+
+def fill(first_user_id):
+    """Строит списки покупок пользователей с ключами от first_user_id.
+
+    Для корзин, загруженных массово в обход сигналов; строк у этих
+    пользователей ещё быть не должно.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(format_sql(FILL), [first_user_id])
+
+
+@contextmanager
+def recipe_changing(recipe_id):
+    """Переносит правку состава рецепта в списки покупок его покупателей."""
+    carted = ShoppingCart.objects.filter(recipe_id=recipe_id).exists()
+    if carted:
+        apply_recipe(recipe_id, -1)
+    yield
+    if carted:
+        apply_recipe(recipe_id, 1)
+
+
+def expected_items():
+    """Списки покупок, посчитанные заново по корзинам."""
+    return ShoppingCart.objects.values(
+        'user_id', ingredient_id=F('recipe__recipes__ingredient_id')
+    ).annotate(
+        amount=Sum('recipe__recipes__amount')
+    ).filter(ingredient_id__isnull=False).order_by('user_id', 'ingredient_id')
+
+
+def stored_items():
+    return ShoppingListItem.objects.values(
+        'user_id', 'ingredient_id', 'amount'
+    ).order_by('user_id', 'ingredient_id')
+
+
+def compare(stored, expected):
+    """Расхождения двух упорядоченных потоков строк.
+
+    Отдаёт тройки (ключ, сохранённое количество, ожидаемое); None -
+    строки нет. Потоки читаются параллельно, целиком в памяти не держатся.
+    """
+    stored, expected = iter(stored), iter(expected)
+    left, right = next(stored, None), next(expected, None)
+    while left is not None or right is not None:
+        left_key = left and (left['user_id'], left['ingredient_id'])
+        right_key = right and (right['user_id'], right['ingredient_id'])
+        if right is None or (left is not None and left_key < right_key):
+            yield left_key, left['amount'], None
+            left = next(stored, None)
+        elif left is None or right_key < left_key:
+            yield right_key, None, Decimal(right['amount']).quantize(CENT)
+            right = next(expected, None)
+        else:
+            amount = Decimal(right['amount']).quantize(CENT)
+            if left['amount'].quantize(CENT) != amount:
+                yield left_key, left['amount'], amount
+            left, right = next(stored, None), next(expected, None)
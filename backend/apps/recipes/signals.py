@@ -0,0 +1,93 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.users.models import Follow, User
+from . import counters, feeds, images, shopping_lists, versions
+from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                     ShoppingCart, Tag)
+
+USER_PUBLIC_FIELDS = {'email', 'username', 'first_name', 'last_name'}
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredients_changed(**kwargs):
+    versions.bump_on_commit(versions.INGREDIENTS)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tags_changed(**kwargs):
+    versions.bump_on_commit(versions.TAGS)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(instance, update_fields=None, **kwargs):
+    if update_fields is None or 'image' in update_fields:
+        images.schedule(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_published(instance, created, **kwargs):
+    if created:
+        feeds.fan_out(instance.pk)
+
+
+# loaddata (raw) приносит счётчики вместе с данными.
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Follow)
+def relation_created(instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_for(instance, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Follow)
+def relation_deleted(instance, **kwargs):
+    counters.change_for(instance, -1)
+
+
+@receiver(post_save, sender=Follow)
+def author_followed(instance, created, **kwargs):
+    if created:
+        feeds.follow(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def author_unfollowed(instance, **kwargs):
+    feeds.unfollow(instance.user_id, instance.author_id)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_changed(instance, **kwargs):
+    versions.bump_on_commit(versions.RECIPES, versions.recipe(instance.pk))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredient_changed(instance, **kwargs):
+    versions.bump_on_commit(
+        versions.RECIPES, versions.recipe(instance.recipe_id))
+
+
+@receiver(post_save, sender=ShoppingCart)
+def recipe_carted(instance, created, **kwargs):
+    if created:
+        shopping_lists.apply_recipe(instance.recipe_id, 1, instance.user_id)
+
+
+# pre_delete: при каскадном удалении рецепта его состав ещё на месте.
+@receiver(pre_delete, sender=ShoppingCart)
+def recipe_uncarted(instance, **kwargs):
+    shopping_lists.apply_recipe(instance.recipe_id, -1, instance.user_id)
+
+
+# Кэшируются только ответы с рецептами: новый пользователь попадёт в
+# них с первым рецептом, а это и так сбросит версию рецептов.
+@receiver(post_save, sender=User)
+def user_changed(created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is None or USER_PUBLIC_FIELDS & set(update_fields):
+        versions.bump_on_commit(versions.USERS)
@@ -0,0 +1,64 @@
+import time
+from functools import partial
+
+from django.core.cache import caches
+from django.db import transaction
+
+INGREDIENTS = 'ingredients'
+RECIPES = 'recipes'
+TAGS = 'tags'
+USERS = 'users'
+
+
+def get_cache():
+    return caches['versions']
+
+
+def get_key(name):
+    return f'version:{name}'
+
+
+def recipe(pk):
+    return f'recipe:{pk}'
+
+
+def get_version(name):
+    """Текущая версия набора данных, общая для всех процессов.
+
+    Начальное значение берётся из времени, чтобы после очистки кэша
+    версия не совпала с уже закэшированной в памяти процесса.
+    """
+    cache = get_cache()
+    version = cache.get(get_key(name))
+    if version is None:
+        cache.add(get_key(name), time.time_ns(), timeout=None)
+        version = cache.get(get_key(name))
+    return version
+
+
+def bump_version(name):
+    cache = get_cache()
+    try:
+        return cache.incr(get_key(name))
+    except ValueError:
+        cache.add(get_key(name), time.time_ns(), timeout=None)
+        return get_version(name)
+
+
+def get_versions(names):
+    """Версии нескольких наборов за одно обращение к кэшу."""
+    keys = [get_key(name) for name in names]
+    values = get_cache().get_many(keys)
+    return [values.get(key) or get_version(name)
+            for key, name in zip(keys, names)]
+
+
+def bump_versions(*names):
+    for name in names:
+        bump_version(name)
+
+
+def bump_on_commit(*names):
+    """Увеличивает версии после коммита, чтобы под новой версией
+    в кэш не попали данные, которые ещё не видны другим соединениям."""
+    transaction.on_commit(partial(bump_versions, *names))
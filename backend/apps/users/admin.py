@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from apps.recipes.paginators import EstimatedCountPaginator
 from . import models
 
 
@@ -7,15 +8,21 @@ from . import models
 class UserAdmin(admin.ModelAdmin):
     list_display = (
         'username', 'pk', 'email', 'password',
-        'first_name', 'last_name', 'joined'
+        'first_name', 'last_name', 'joined',
+        'recipes_count', 'followers_count'
     )
-    list_filter = ('username', 'email')
-    search_fields = ('username', 'email')
+    list_filter = ('is_staff', 'is_active')
+    search_fields = ('^username', '^email')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
 
 @admin.register(models.Follow)
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'author')
-    list_editable = ('user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
@@ -53,6 +53,16 @@ class User(AbstractUser):
         max_length=MAX_LENGTH_USERFIELDS,
         help_text=_('Введите пароль')
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name=_('Число рецептов'),
+        default=0,
+        editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name=_('Число подписчиков'),
+        default=0,
+        editable=False
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name')
@@ -90,6 +100,10 @@ class Follow(models.Model):
                 name='unique_subscription',
             )
         ]
+        indexes = [
+            models.Index(fields=('author', 'user'),
+                         name='follow_author_user_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.author.username}'
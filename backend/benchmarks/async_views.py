@@ -0,0 +1,138 @@
+"""Нагрузочное сравнение WSGI и ASGI на горячих GET-эндпоинтах.
+
+Запустите оба сервера на одной базе, например из папки backend:
+    gunicorn -w 4 -b 127.0.0.1:8001 foodgram.wsgi:application
+    gunicorn -c gunicorn_asgi.py -w 4 -b 127.0.0.1:8002 \\
+        foodgram.asgi:application
+и затем
+    python -m benchmarks.async_views --wsgi http://127.0.0.1:8001 \\
+        --asgi http://127.0.0.1:8002 --concurrency 64 --requests 2000
+
+С --token запросы идут от пользователя и добавляется список подписок.
+Для каждого адреса выводятся запросы в секунду, p50 и p99 задержки.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import quote, urlsplit
+
+PATHS = (
+    '/api/recipes/',
+    '/api/recipes/?page=2&limit=6',
+    '/api/recipes/{recipe_id}/',
+    '/api/tags/',
+    '/api/ingredients/?name=мол',
+)
+AUTH_PATHS = ('/api/users/subscriptions/?recipes_limit=3',)
+WARMUP = 50
+
+
+class Connection:
+    """Минимальный HTTP/1.1 клиент с keep-alive поверх asyncio."""
+
+    def __init__(self, base_url, headers):
+        url = urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.headers = ''.join(f'{name}: {value}\r\n'
+                               for name, value in headers.items())
+        self.reader = self.writer = None
+
+    async def get(self, path):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port)
+        target = quote(path, safe='/?=&')
+        self.writer.write(
+            f'GET {target} HTTP/1.1\r\nHost: {self.host}\r\n'
+            f'{self.headers}\r\n'.encode())
+        await self.writer.drain()
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        status_line, *lines = head.decode('latin-1').split('\r\n')
+        headers = dict(line.lower().split(': ', 1) for line in lines if line)
+        if 'content-length' in headers:
+            body = await self.reader.readexactly(
+                int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+        if ('content-length' not in headers
+                or headers.get('connection') == 'close'):
+            await self.close()
+        return int(status_line.split()[1]), body
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def run_load(base_url, path, headers, concurrency, requests):
+    latencies = []
+    errors = 0
+    queue = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        connection = Connection(base_url, headers)
+        for _ in queue:
+            start = time.perf_counter()
+            try:
+                status, _ = await connection.get(path)
+            except (OSError, asyncio.IncompleteReadError):
+                status = None
+                await connection.close()
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+        await connection.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'rps': requests / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'errors': errors,
+    }
+
+
+async def first_recipe_id(base_url, headers):
+    connection = Connection(base_url, headers)
+    _, body = await connection.get('/api/recipes/?limit=1')
+    await connection.close()
+    return json.loads(body)['results'][0]['id']
+
+
+async def main(options):
+    headers = {}
+    paths = list(PATHS)
+    if options.token:
+        headers['Authorization'] = f'Token {options.token}'
+        paths += AUTH_PATHS
+    recipe_id = await first_recipe_id(options.wsgi, headers)
+    paths = [path.format(recipe_id=recipe_id) for path in paths]
+    print(f'{"":5} {"адрес":45} {"rps":>8} {"p50, мс":>9} {"p99, мс":>9} '
+          f'{"ошибки":>7}')
+    for path in paths:
+        for name, base_url in (('wsgi', options.wsgi),
+                               ('asgi', options.asgi)):
+            await run_load(base_url, path, headers,
+                           min(options.concurrency, WARMUP), WARMUP)
+            result = await run_load(base_url, path, headers,
+                                    options.concurrency, options.requests)
+            print(f'{name:5} {path:45} {result["rps"]:8.0f} '
+                  f'{result["p50"]:9.1f} {result["p99"]:9.1f} '
+                  f'{result["errors"]:7}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--wsgi', default='http://127.0.0.1:8001')
+    parser.add_argument('--asgi', default='http://127.0.0.1:8002')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--token')
+    asyncio.run(main(parser.parse_args()))
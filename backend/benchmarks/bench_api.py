@@ -0,0 +1,86 @@
+"""Сценарии бенчмарка: реальные эндпоинты через тестовый клиент DRF."""
+from itertools import combinations
+
+import pytest
+
+IMAGE = ('data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAf'
+         'FcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg==')
+FILTERS = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart', 'search')
+SEARCHES = ('мо', 'мук', 'сах', 'карт', 'лу', 'рис', 'сме', 'говя')
+
+
+def filter_params(data, names):
+    values = {
+        'tags': f'tags={data.tags[0].slug}&tags={data.tags[1].slug}',
+        'author': f'author={data.followed.pk}',
+        'is_favorited': 'is_favorited=1',
+        'is_in_shopping_cart': 'is_in_shopping_cart=1',
+        'search': 'search=блины',
+    }
+    return '&'.join(values[name] for name in names)
+
+
+def recipe_payload(data, number):
+    ingredients = data.ingredients[number % 50:number % 50 + 8]
+    return {
+        'name': f'Бенчмарк {number}', 'text': 'Текст', 'cooking_time': 15,
+        'image': IMAGE, 'tags': [tag.pk for tag in data.tags[:2]],
+        'ingredients': [{'id': ingredient.pk, 'amount': number % 90 + 10}
+                        for ingredient in ingredients],
+    }
+
+
+@pytest.mark.parametrize('names', [
+    names for size in range(len(FILTERS) + 1)
+    for names in combinations(FILTERS, size)
+], ids=lambda names: '+'.join(names) or 'no_filters')
+def test_recipe_list(bench, client, data, names):
+    url = f'/api/recipes/?{filter_params(data, names)}'
+    bench(lambda number: client.get(url))
+
+
+def test_recipe_list_anonymous(bench, anonymous_client):
+    bench(lambda number: anonymous_client.get(
+        f'/api/recipes/?page={number % 5 + 1}'))
+
+
+def test_recipe_list_compact(bench, client):
+    bench(lambda number: client.get('/api/recipes/?view=compact'))
+
+
+def test_recipe_detail(bench, client, data):
+    bench(lambda number: client.get(f'/api/recipes/{data.recipe.pk}/'))
+
+
+def test_subscriptions(bench, client):
+    bench(lambda number: client.get(
+        '/api/users/subscriptions/?recipes_limit=3'))
+
+
+def test_feed(bench, client):
+    bench(lambda number: client.get('/api/recipes/feed/'))
+
+
+def test_ingredient_search(bench, client):
+    bench(lambda number: client.get(
+        f'/api/ingredients/?name={SEARCHES[number % len(SEARCHES)]}'))
+
+
+@pytest.mark.parametrize('file_format', ('pdf', 'txt', 'csv'))
+def test_shopping_list_download(bench, client, file_format):
+    bench(lambda number: client.get(
+        f'/api/recipes/download_shopping_cart/?format={file_format}'))
+
+
+def test_recipe_create(bench, client, data):
+    bench(lambda number: client.post(
+        '/api/recipes/', recipe_payload(data, number), format='json'))
+
+
+def test_recipe_update(bench, client, data):
+    def send(number):
+        payload = recipe_payload(data, number)
+        del payload['image']
+        return client.patch(f'/api/recipes/{data.own_recipe.pk}/', payload,
+                            format='json')
+    bench(send)
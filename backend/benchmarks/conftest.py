@@ -0,0 +1,165 @@
+"""Бенчмарк API: pytest из корня репозитория (см. pytest.ini).
+
+Перед запуском задайте те же переменные окружения, что и для
+manage.py test. Тестовая база создаётся заново и заполняется
+benchmarks.seed; запросы идут через тестовый клиент DRF.
+
+Для каждого сценария выводятся p50 и p99 задержки, SQL-запросы на
+запрос и пропускная способность. С --bench-save-baseline результаты
+пишутся в базовый JSON; без него сценарий падает, если p50 или число
+запросов хуже базового больше чем на --bench-threshold. Базовый файл
+зависит от машины, поэтому в репозиторий не добавляется.
+"""
+import json
+import os
+import re
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import django
+import pytest
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from django.core.cache import caches  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import override_settings, utils  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from . import seed  # noqa: E402
+
+BASELINE = Path(__file__).with_name('baseline.json')
+# Ниже этой разницы колебания p50 не считаются регрессией.
+MIN_SLOWDOWN_MS = 1.0
+WARMUP = 3
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmark')
+    group.addoption('--bench-scale', type=float, default=1.0,
+                    help='Множитель объёмов из benchmarks.seed.VOLUMES.')
+    group.addoption('--bench-seed', type=int, default=42)
+    group.addoption('--bench-requests', type=int, default=30,
+                    help='Запросов на сценарий.')
+    group.addoption('--bench-baseline', default=str(BASELINE))
+    group.addoption('--bench-save-baseline', action='store_true')
+    group.addoption('--bench-threshold', type=float, default=0.25,
+                    help='Допустимое ухудшение, доля от базового.')
+
+
+def pytest_configure(config):
+    config.bench_results = {}
+
+
+@pytest.fixture(scope='session')
+def data(request):
+    utils.setup_test_environment()
+    media = override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    media.enable()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    for name in ('default', 'versions'):
+        caches[name].clear()
+    try:
+        yield seed.seed(request.config.getoption('bench_scale'),
+                        request.config.getoption('bench_seed'))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        shutil.rmtree(media.options['MEDIA_ROOT'], ignore_errors=True)
+        media.disable()
+        utils.teardown_test_environment()
+
+
+@pytest.fixture
+def client(data):
+    """Клиент от имени пользователя с подписками, избранным и корзиной."""
+    client = APIClient()
+    client.force_authenticate(data.user)
+    return client
+
+
+@pytest.fixture
+def anonymous_client(data):
+    return APIClient()
+
+
+def read_baseline(config):
+    path = Path(config.getoption('bench_baseline'))
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def measure(send, requests):
+    """Замеры по запросам; send возвращает ответ тестового клиента."""
+    latencies, queries = [], []
+    for number in range(WARMUP + requests):
+        start = time.perf_counter()
+        response = send(number)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        elapsed = time.perf_counter() - start
+        assert response.status_code < 400, response.status_code
+        if number >= WARMUP:
+            latencies.append(elapsed * 1000)
+            queries.append(int(QUERIES.search(
+                response['Server-Timing']).group(1)))
+    latencies.sort()
+    return {
+        'p50': statistics.median(latencies),
+        'p99': latencies[max(0, int(len(latencies) * 0.99) - 1)],
+        'queries': statistics.mean(queries),
+        'rps': 1000 * len(latencies) / sum(latencies),
+    }
+
+
+@pytest.fixture
+def bench(request):
+    """bench(send): прогоняет сценарий и сверяет с базовым JSON."""
+    config = request.config
+
+    def run(send):
+        result = measure(send, config.getoption('bench_requests'))
+        name = request.node.name
+        config.bench_results[name] = result
+        base = read_baseline(config).get(name)
+        if base is None or config.getoption('bench_save_baseline'):
+            return result
+        limit = 1 + config.getoption('bench_threshold')
+        failures = []
+        if result['p50'] > max(base['p50'] * limit,
+                               base['p50'] + MIN_SLOWDOWN_MS):
+            failures.append(
+                f'p50 {result["p50"]:.1f} мс, было {base["p50"]:.1f} мс')
+        if result['queries'] > base['queries'] * limit:
+            failures.append(f'запросов {result["queries"]:.1f}, '
+                            f'было {base["queries"]:.1f}')
+        if failures:
+            pytest.fail(f'{name}: ' + '; '.join(failures))
+        return result
+    return run
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    if config.bench_results and config.getoption('bench_save_baseline'):
+        baseline = {**read_baseline(config), **config.bench_results}
+        Path(config.getoption('bench_baseline')).write_text(
+            json.dumps(baseline, ensure_ascii=False, indent=2,
+                       sort_keys=True), encoding='utf-8')
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not config.bench_results:
+        return
+    write = terminalreporter.write_line
+    terminalreporter.section('benchmarks')
+    write(f'{"сценарий":72} {"p50, мс":>9} {"p99, мс":>9} '
+          f'{"запросов":>9} {"rps":>8}')
+    for name, result in config.bench_results.items():
+        write(f'{name:72} {result["p50"]:9.1f} {result["p99"]:9.1f} '
+              f'{result["queries"]:9.1f} {result["rps"]:8.0f}')
@@ -0,0 +1,47 @@
+"""Бенчмарк поиска ингредиентов по индексу при росте справочника.
+
+Запуск из папки backend:
+    python -m benchmarks.ingredient_search
+"""
+import os
+import random
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from apps.recipes.search import IngredientIndex  # noqa: E402
+
+SIZES = (2_000, 20_000, 200_000)
+QUERIES = ('м', 'мо', 'мол', 'молоко', 'ко', 'сыр', 'вая', 'ная мука')
+REPEATS = 200
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+WORDS = ('молоко', 'мука', 'сыр', 'масло', 'соль', 'сахар', 'перец')
+
+
+def make_rows(size, seed=0):
+    rng = random.Random(seed)
+    for pk in range(size):
+        word = ''.join(rng.choices(ALPHABET, k=rng.randint(4, 10)))
+        yield pk, f'{rng.choice(WORDS)} {word}ная', 'г'
+
+
+def main():
+    for size in SIZES:
+        start = time.perf_counter()
+        index = IngredientIndex(make_rows(size))
+        build_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            for query in QUERIES:
+                index.search(query)
+        search_us = ((time.perf_counter() - start)
+                     / (REPEATS * len(QUERIES)) * 1_000_000)
+        print(f'{size:>7} ингредиентов: построение {build_ms:8.1f} мс, '
+              f'запрос {search_us:7.1f} мкс')
+
+
+if __name__ == '__main__':
+    main()
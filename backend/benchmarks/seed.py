@@ -0,0 +1,42 @@
+"""Синтетические данные для бенчмарков API.
+
+Данные создаёт тот же apps.recipes.generator, что и команда
+generate_fixtures; объёмы при scale=1 заданы в VOLUMES. Первый
+пользователь - самый популярный автор, от его имени идут запросы: у него
+есть подписки, избранное, корзина и собственные рецепты.
+"""
+from types import SimpleNamespace
+
+from apps.recipes import generator
+from apps.recipes.models import Ingredient, Recipe, Tag
+from apps.users.models import Follow, User
+
+VOLUMES = {
+    'users': 200,
+    'recipes': 2000,
+    'ingredients': 2000,
+    'follows': 10,
+    'favorites': 20,
+    'carts': 5,
+}
+SCALED = ('users', 'ingredients', 'recipes')
+# Одна картинка-заглушка, чтобы у рецептов были уменьшенные копии.
+IMAGES = 1
+
+
+def get_volumes(scale):
+    return {name: max(2, round(value * scale)) if name in SCALED else value
+            for name, value in VOLUMES.items()}
+
+
+def seed(scale=1.0, random_seed=42):
+    first_user, first_recipe = generator.generate(
+        **get_volumes(scale), images=IMAGES, seed=random_seed)
+    user = User.objects.get(pk=first_user)
+    recipes = Recipe.objects.filter(pk__gte=first_recipe)
+    return SimpleNamespace(
+        user=user, tags=list(Tag.objects.order_by('pk')),
+        ingredients=list(Ingredient.objects.order_by('pk')),
+        own_recipe=recipes.filter(author=user).first(),
+        recipe=recipes.order_by('pk')[recipes.count() // 2],
+        followed=Follow.objects.filter(user=user).first().author)
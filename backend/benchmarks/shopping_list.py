@@ -0,0 +1,72 @@
+"""Бенчмарк генерации списка покупок: PDF и потоковые txt/csv.
+
+Запуск из папки backend:
+    python -m benchmarks.shopping_list
+"""
+import io
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+
+from api import shopping_list  # noqa: E402
+
+SIZES = (10, 500, 5000)
+REPEATS = 20
+
+
+def make_cart(size):
+    return [
+        {'ingredient__name': f'Ингредиент {i}',
+         'ingredient__measurement_unit': 'г',
+         'amount': i * 1.5}
+        for i in range(size)
+    ]
+
+
+def measure(func, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def first_chunk(file_format, title, cart):
+    return next(shopping_list.join_chunks(
+        shopping_list.ITERATORS[file_format](title, cart)))
+
+
+def full_stream(file_format, title, cart):
+    for _ in shopping_list.join_chunks(
+            shopping_list.ITERATORS[file_format](title, cart)):
+        pass
+
+
+def main():
+    title = ['Список покупок для: Бенчмарк', 'Дата: сегодня']
+    shopping_list.register_fonts()
+    for size in SIZES:
+        cart = make_cart(size)
+        body = [shopping_list.get_line(item) for item in cart]
+        render_ms = measure(
+            lambda: shopping_list.render(title, body, io.BytesIO()))
+        cache.clear()
+        shopping_list.get_pdf(title, body)
+        cached_ms = measure(lambda: shopping_list.get_pdf(title, body))
+        size_kb = len(shopping_list.get_pdf(title, body).getvalue()) / 1024
+        print(f'{size:>5} ингредиентов: pdf рендер {render_ms:8.2f} мс, '
+              f'из кэша {cached_ms:6.3f} мс, {size_kb:7.1f} КБ')
+        for file_format in shopping_list.ITERATORS:
+            first_ms = measure(lambda: first_chunk(file_format, title, cart))
+            total_ms = measure(lambda: full_stream(file_format, title, cart))
+            print(f'{"":>18} {file_format}: первый кусок {first_ms:6.3f} мс, '
+                  f'весь файл {total_ms:7.2f} мс')
+
+
+if __name__ == '__main__':
+    main()
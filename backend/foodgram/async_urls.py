@@ -0,0 +1,10 @@
+from django.urls import include, path
+
+from .urls import urlpatterns as sync_urlpatterns
+
+# Горячие GET-запросы обслуживают асинхронные представления, остальное -
+# обычные маршруты foodgram.urls.
+urlpatterns = [
+    path('api/', include('api.async_urls')),
+    *sync_urlpatterns,
+]
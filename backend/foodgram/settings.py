@@ -1,5 +1,6 @@
 import os
 import re
+import tempfile
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -33,6 +34,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.metrics.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -42,7 +44,10 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "foodgram.urls"
+# Под ASGI (foodgram/asgi.py) горячие GET-запросы обслуживают
+# асинхронные представления из foodgram.async_urls.
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "False") == "True"
+ROOT_URLCONF = "foodgram.async_urls" if ASYNC_VIEWS else "foodgram.urls"
 
 TEMPLATES = [
     {
@@ -73,6 +78,19 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "versions": {
+        "BACKEND": os.getenv(
+            "VERSIONS_CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.getenv(
+            "VERSIONS_CACHE_LOCATION",
+            os.path.join(tempfile.gettempdir(), "foodgram-versions")),
+    },
+}
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -144,4 +162,21 @@ DJOSER = {
 
 AUTH_USER_MODEL = "users.User"
 
-FILE_NAME = "shopping.pdf"
+FILE_NAME = "shopping"
+SHOPPING_LIST_CACHE_TIMEOUT = 60 * 60
+INGREDIENT_SEARCH_LIMIT = 20
+BULK_RECIPES_LIMIT = 500
+REFERENCE_CACHE_MAX_AGE = 60
+REFERENCE_CACHE_SIZE = 1000
+ANONYMOUS_CACHE_TIMEOUT = 10 * 60
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
+FEED_FANOUT_LIMIT = int(os.getenv("FEED_FANOUT_LIMIT", 10000))
+RECIPE_IMAGE_WIDTHS = (300, 600)
+RECIPE_IMAGE_FORMATS = ("jpeg", "webp")
+RECIPE_IMAGE_QUALITY = 80
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+BACKUP_APPS = ("users", "recipes", "authtoken")
+BACKUP_CHUNK_SIZE = 2000
+BACKUP_JOBS = int(os.getenv("BACKUP_JOBS", 4))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
@@ -0,0 +1,17 @@
+"""Настройки gunicorn для запуска под ASGI с воркерами uvicorn.
+
+    gunicorn -c gunicorn_asgi.py foodgram.asgi:application
+
+foodgram/asgi.py включает ASYNC_VIEWS: горячие GET-запросы обслуживают
+асинхронные представления, остальные - обычные представления DRF в пуле
+потоков. Каждый воркер держит много одновременных запросов, поэтому
+воркеров нужно не больше, чем ядер.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0:8000')
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+keepalive = 5
+graceful_timeout = 30
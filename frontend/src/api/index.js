@@ -330,16 +330,22 @@ class Api {
 
   // tags
   getTags () {
-    const token = localStorage.getItem('token')
-    return fetch(
-      `/api/tags/`,
-      {
-        method: 'GET',
-        headers: {
-          ...this._headers
+    // tags rarely change, so they are requested once per session
+    if (!this._tags) {
+      this._tags = fetch(
+        `/api/tags/`,
+        {
+          method: 'GET',
+          headers: {
+            ...this._headers
+          }
         }
-      }
-    ).then(this.checkResponse)
+      ).then(this.checkResponse).catch(error => {
+        this._tags = null
+        throw error
+      })
+    }
+    return this._tags
   }
 
 